@@ -0,0 +1,56 @@
+# Benchmark: batch ingredient requirements, per-order loop vs BillOfMaterials (NumPy and pure Python)
+# Run from the repository root: python benchmarks/bench_bom.py [--orders 1000 10000 100000]
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pizza_shop_app_1_2_20007495 as shop
+
+
+def per_order_loop(orders):
+    """ The original approach: build each order's needs dict and add it up one ingredient at a time. """
+    totals = {}
+    for order in orders:
+        pizza = dict(shop.PIZZA_RECIPES[order["size"].lower()])
+        for ingredient, amount in shop.PIZZA_TYPE_ADJUSTMENTS.get(order["pizza_type"], {}).items():
+            pizza[ingredient] = max(0, pizza.get(ingredient, 0) + amount)
+        for ingredient, amount in pizza.items():
+            pizza[ingredient] *= order["quantity"]
+        for ingredient, amount in pizza.items():
+            totals[ingredient] = totals.get(ingredient, 0) + amount
+    return totals
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch requirement planning: per-order loop vs bill of materials")
+    parser.add_argument("--orders", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    numpy_book = shop.BillOfMaterials()
+    pure_book = shop.BillOfMaterials(pure_stdlib=True)
+    numpy_book.requirements([]) # Build the matrix outside the timings
+    backend = "numpy" if not numpy_book.pure_stdlib else "numpy missing, pure"
+
+    print(f"{'orders':>8} | {'loop ms':>9} | {backend + ' ms':>9} | {'pure ms':>9}")
+    for count in args.orders:
+        orders = list(shop.random_orders(count, seed=args.seed).values())
+        loop_time, loop_totals = timed(per_order_loop, orders)
+        numpy_time, numpy_totals = timed(numpy_book.requirements, orders)
+        pure_time, pure_totals = timed(pure_book.requirements, orders)
+        if not numpy_totals == pure_totals == loop_totals:
+            sys.exit(f"Backends disagree: {numpy_totals} != {pure_totals} != {loop_totals}")
+        print(f"{count:>8} | {loop_time * 1000:>9.2f} | {numpy_time * 1000:>9.2f} | {pure_time * 1000:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
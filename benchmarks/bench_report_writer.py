@@ -0,0 +1,78 @@
+# Benchmark: full order log PDF rebuild vs StreamingReportWriter
+# Run from the repository root: python benchmarks/bench_report_writer.py [--sizes 1000 10000 100000]
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fpdf import FPDF
+import pizza_shop_app_1_2_20007495 as shop
+
+NEW_ENTRIES = 100 # Entries appended between the cold export and the incremental one
+
+
+def full_rebuild(log, filename):
+    """ The original order_updates_to_file PDF block: one FPDF document holding every entry. """
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+    pdf.cell(200, 10, txt="Order Log", ln=True, align='C')
+    pdf.cell(200, 10, txt="", ln=True)  # Blank line
+    for entry in log.iter_entries():
+        pdf.cell(200, 10, txt=shop.format_log_entry(entry), ln=True, align='L')
+    pdf.output(filename)
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / (1024 * 1024)
+
+
+def fill_log(log, count, start=0):
+    for i in range(start, start + count):
+        log.append(i, "Registered", "2024-01-01T12:00:00")
+
+
+def run(size, workdir):
+    log = shop.OrderEventLog(os.path.join(workdir, f"log_{size}.jsonl"), fsync_every=10_000)
+    fill_log(log, size)
+    writer = shop.StreamingReportWriter(os.path.join(workdir, f"stream_{size}.pdf"))
+
+    full_time, full_mem = measure(full_rebuild, log, os.path.join(workdir, f"full_{size}.pdf"))
+    cold_time, cold_mem = measure(writer.render, log)
+    fill_log(log, NEW_ENTRIES, start=size)
+    incr_time, incr_mem = measure(writer.render, log)
+    log.close()
+    return {
+        "entries": size,
+        "full_rebuild_s": full_time, "full_rebuild_peak_mb": full_mem,
+        "streaming_cold_s": cold_time, "streaming_cold_peak_mb": cold_mem,
+        "streaming_incremental_s": incr_time, "streaming_incremental_peak_mb": incr_mem,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Order log PDF: full rebuild vs streaming writer")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'entries':>8} | {'full s':>8} {'MB':>7} | {'stream s':>8} {'MB':>7} | {f'+{NEW_ENTRIES} s':>8} {'MB':>7}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            r = run(size, workdir)
+            print(f"{r['entries']:>8} | {r['full_rebuild_s']:>8.3f} {r['full_rebuild_peak_mb']:>7.1f} | "
+                  f"{r['streaming_cold_s']:>8.3f} {r['streaming_cold_peak_mb']:>7.1f} | "
+                  f"{r['streaming_incremental_s']:>8.3f} {r['streaming_incremental_peak_mb']:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
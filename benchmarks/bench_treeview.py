@@ -0,0 +1,83 @@
+# Benchmark: Order Track row lookup by linear scan vs order id as Treeview iid
+# Needs a display. Run from the repository root: python benchmarks/bench_treeview.py [--rows 1000 10000]
+import argparse
+import random
+import time
+import tkinter as tk
+from tkinter import ttk
+
+UPDATES = 200 # Status updates (then deletes) timed per run
+
+
+def linear_update(tree, order_id, status):
+    """ The original update_status_in_tree: scan every row and read its values. """
+    order_id_str = str(order_id)
+    for item in tree.get_children():
+        if tree.item(item, "values")[0] == order_id_str:
+            tree.item(item, values=(order_id_str, status))
+            return
+
+
+def linear_delete(tree, order_id):
+    for item in tree.get_children():
+        if str(tree.item(item)["values"][0]) == str(order_id):
+            tree.delete(item)
+            return
+
+
+def indexed_update(tree, order_id, status):
+    order_id_str = str(order_id)
+    if tree.exists(order_id_str):
+        tree.item(order_id_str, values=(order_id_str, status))
+
+
+def indexed_delete(tree, order_id):
+    if tree.exists(str(order_id)):
+        tree.delete(str(order_id))
+
+
+def run(root, rows, use_iid):
+    tree = ttk.Treeview(root, columns=("Order Number", "Status"), show="headings")
+    for order_id in range(rows):
+        if use_iid:
+            tree.insert("", "end", iid=str(order_id), values=(order_id, "Registered"))
+        else:
+            tree.insert("", "end", values=(order_id, "Registered"))
+    targets = random.Random(rows).sample(range(rows), UPDATES)
+    update, delete = (indexed_update, indexed_delete) if use_iid else (linear_update, linear_delete)
+
+    start = time.perf_counter()
+    for order_id in targets:
+        update(tree, order_id, "Cooking")
+    update_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for order_id in targets:
+        delete(tree, order_id)
+    delete_time = time.perf_counter() - start
+    tree.destroy()
+    return update_time / UPDATES * 1e6, delete_time / UPDATES * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Order Track Treeview: linear scan vs iid index")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    args = parser.parse_args()
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"Skipping, no display available: {e}")
+        return
+    root.withdraw()
+
+    print(f"{'rows':>7} | {'scan update us':>14} {'scan delete us':>14} | {'iid update us':>13} {'iid delete us':>13}")
+    for rows in args.rows:
+        scan = run(root, rows, use_iid=False)
+        indexed = run(root, rows, use_iid=True)
+        print(f"{rows:>7} | {scan[0]:>14.1f} {scan[1]:>14.1f} | {indexed[0]:>13.1f} {indexed[1]:>13.1f}")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
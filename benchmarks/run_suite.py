@@ -0,0 +1,379 @@
+# Benchmark suite: order workflow throughput, order log, session, Treeview and report costs
+# Headless: Tk is replaced with stubs, so it runs without a display. Workloads come from WorkloadGenerator with
+# the app's default order mix and arrivals (as generate_random_orders uses), seeded and from a fixed start time,
+# so two runs with the same --seed measure the same work.
+# Run from the repository root:
+#   python benchmarks/run_suite.py --output results.json
+#   python benchmarks/run_suite.py --output new.json --compare results.json   (exits 1 on a regression)
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from unittest import mock
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import pizza_shop_app_1_2_20007495 as shop
+
+SIZES = {
+    "full": {"orders": 500, "log": [1000, 10000, 100000], "session": [1000, 10000, 50000],
+             "rows": [100, 1000, 10000], "report": [1000, 10000]},
+    "quick": {"orders": 100, "log": [1000, 10000], "session": [1000, 10000],
+              "rows": [100, 1000], "report": [1000]},
+}
+TIME_SCALE = 0.001 # Kitchen durations, batch windows and pickups run 1000x faster than real time
+LOG_CALLS = 2000 # order_updates_to_file calls timed per log size
+TREE_UPDATES = 500 # Status updates (then removals) timed per row count
+HIGHER_IS_BETTER = ("_per_second",) # Metric name suffixes, every other metric is a time
+WORKLOAD_START = datetime(2024, 1, 1, shop.OPENING_HOUR) # Fixed so registration times repeat between runs
+
+
+class Var:
+    """ Stand-in for tk.StringVar / IntVar / BooleanVar """
+    def __init__(self, master=None, value=None, **kwargs):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+    def trace_add(self, *args):
+        pass
+
+
+class HeadlessTreeview:
+    """ Just enough of ttk.Treeview for the Order Track code: rows by iid, in insertion order """
+    def __init__(self):
+        self.rows = {}
+
+    def insert(self, parent, index, iid=None, values=()):
+        self.rows[iid] = tuple(values)
+        return iid
+
+    def exists(self, iid):
+        return iid in self.rows
+
+    def item(self, iid, values=None, **kwargs):
+        if values is None:
+            return {"values": list(self.rows[iid])}
+        self.rows[iid] = tuple(values)
+
+    def delete(self, *iids):
+        for iid in iids:
+            del self.rows[iid]
+
+    def get_children(self, item=""):
+        return tuple(self.rows)
+
+
+def stub_tk():
+    """ Swap the app's Tk modules for mocks so PizzaShopApp can be built without a display """
+    shop.tk = mock.MagicMock()
+    shop.tk.StringVar = shop.tk.IntVar = shop.tk.BooleanVar = Var
+    shop.ttk = mock.MagicMock()
+    shop.messagebox = mock.MagicMock()
+
+
+def workload(count, seed):
+    """ count orders from the generator behind generate_random_orders, order id -> order """
+    return dict(shop.WorkloadGenerator(seed=seed, start=WORKLOAD_START).orders(count))
+
+
+@contextlib.contextmanager
+def temporary_workdir():
+    """ A temporary directory made the cwd for the app's relative file names, restored even if a bench fails """
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            yield workdir
+        finally:
+            os.chdir(previous) # Leave before the directory is deleted
+
+
+def median_of(repeat, func):
+    return statistics.median(func() for _ in range(repeat))
+
+
+def reset_globals(workdir):
+    """ Fresh module-level state for each app run, all files inside workdir """
+    shop.stop_flag.clear()
+    shop.inventory = shop.InventoryManager(shop.INGREDIENTS)
+    shop.order_event_log = shop.OrderEventLog(os.path.join(workdir, shop.ORDER_LOG_FILE))
+    shop.report_writer = shop.ReportWriterThread(shop.order_event_log,
+                                                 pdf_filename=os.path.join(workdir, shop.ORDER_LOG_PDF))
+
+
+# End-to-end order throughput
+def run_throughput(count, seed):
+    """ Place count orders through add_order and time them until every one is collected """
+    orders = list(workload(count, seed).values())
+    with temporary_workdir() as workdir:
+        reset_globals(workdir)
+        root = mock.MagicMock()
+        app = shop.PizzaShopApp(root, max_in_flight=count, max_held=count, time_scale=TIME_SCALE)
+        app.wait_for_session()
+        started = time.perf_counter()
+        for order in orders:
+            app.pizza_type_var.set(order["pizza_type"])
+            app.size_var.set(order["size"])
+            app.qty_var.set(order["quantity"])
+            app.add_order()
+        while app.pipeline.completed + app.pipeline.failed < count:
+            if time.perf_counter() - started > 120:
+                raise RuntimeError(f"only {app.pipeline.completed} of {count} orders finished")
+            time.sleep(0.001)
+        elapsed = time.perf_counter() - started
+        failed = app.pipeline.failed
+        app.shutdown()
+    if failed:
+        raise RuntimeError(f"{failed} orders failed")
+    return count / elapsed
+
+
+def bench_throughput(sizes, seed, repeat):
+    with mock.patch("builtins.print"): # Shutdown prints its report
+        rate = median_of(repeat, lambda: run_throughput(sizes["orders"], seed))
+    return {"throughput.orders_per_second": rate}
+
+
+# order_updates_to_file against log size
+def run_order_log(size, workdir):
+    log = shop.OrderEventLog(os.path.join(workdir, f"log_{size}.jsonl"), fsync_every=10_000)
+    for start in range(0, size, 10_000):
+        log.append_many([{"order_id": i, "action": "Registered", "timestamp": "2024-01-01T12:00:00"}
+                         for i in range(start, min(size, start + 10_000))])
+    # Never re-render the PDF during the run, report generation is measured on its own
+    shop.report_writer = writer = shop.ReportWriterThread(log, render_interval=3600,
+                                                          pdf_filename=os.path.join(workdir, f"log_{size}.pdf"))
+    writer.start()
+    started = time.perf_counter()
+    for i in range(LOG_CALLS):
+        shop.order_updates_to_file(size + i, "Cooking")
+    enqueued = time.perf_counter() - started
+    while writer.written < LOG_CALLS:
+        time.sleep(0.0005)
+    written = time.perf_counter() - started
+    writer._dirty = False # Skip the final render in close()
+    writer.close()
+    return enqueued / LOG_CALLS * 1e6, written / LOG_CALLS * 1e6
+
+
+def bench_order_log(sizes, seed, repeat):
+    metrics = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes["log"]:
+            runs = [run_order_log(size, workdir) for _ in range(repeat)]
+            metrics[f"order_log.call_us@{size}"] = statistics.median(run[0] for run in runs)
+            metrics[f"order_log.written_us@{size}"] = statistics.median(run[1] for run in runs)
+    return metrics
+
+
+# save_session / load_session against order count
+def bench_session(sizes, seed, repeat):
+    metrics = {}
+    with temporary_workdir():
+        for count in sizes["session"]:
+            orders = {int(order_id): order for order_id, order in workload(count, seed).items()}
+
+            def save():
+                started = time.perf_counter()
+                shop.save_session(orders, count + 1)
+                return time.perf_counter() - started
+
+            def load():
+                started = time.perf_counter()
+                loaded = shop.load_session()
+                elapsed = time.perf_counter() - started
+                assert len(loaded["orders"]) == count
+                return elapsed
+
+            metrics[f"session.save_s@{count}"] = median_of(repeat, save)
+            metrics[f"session.load_s@{count}"] = median_of(repeat, load)
+    return metrics
+
+
+# Treeview updates against row count
+def make_tree():
+    """ A real ttk.Treeview when a display is available, otherwise the headless stand-in """
+    try:
+        import tkinter
+        from tkinter import ttk
+        root = tkinter.Tk()
+        root.withdraw()
+        return "tk", root, lambda: ttk.Treeview(root, columns=("Order Number", "Status"), show="headings")
+    except Exception:
+        return "headless", None, HeadlessTreeview
+
+
+def run_treeview(new_tree, rows, seed):
+    view = SimpleNamespace(track_tree=new_tree())
+    for order_id in range(rows):
+        shop.PizzaShopApp.add_order_to_tree(view, order_id, "Registered")
+    targets = [str(order_id) for order_id in random.Random(seed).sample(range(rows), min(rows, TREE_UPDATES))]
+    started = time.perf_counter()
+    for order_id in targets:
+        shop.PizzaShopApp.apply_tree_updates(view, {order_id: "Cooking"})
+    updated = time.perf_counter() - started
+    started = time.perf_counter()
+    for order_id in targets:
+        shop.PizzaShopApp.apply_tree_updates(view, {order_id: None})
+    removed = time.perf_counter() - started
+    return updated / len(targets) * 1e6, removed / len(targets) * 1e6
+
+
+def bench_treeview(sizes, seed, repeat, tree_factory):
+    metrics = {}
+    for rows in sizes["rows"]:
+        runs = [run_treeview(tree_factory, rows, seed) for _ in range(repeat)]
+        metrics[f"treeview.update_us@{rows}"] = statistics.median(run[0] for run in runs)
+        metrics[f"treeview.remove_us@{rows}"] = statistics.median(run[1] for run in runs)
+    return metrics
+
+
+# Report generation
+def bench_reports(sizes, seed, repeat):
+    metrics = {}
+    with temporary_workdir(), mock.patch("webbrowser.open"):
+        shop.generate_pdf("warm_up.pdf", ["Warm up"]) # First use imports fpdf and loads its fonts
+        for count in sizes["report"]:
+            orders = list(workload(count, seed).items())
+            analytics = shop.OrderAnalytics.rebuild(orders)
+
+            def favourites():
+                started = time.perf_counter()
+                shop.generate_pdf("favourites_report_1_2.pdf", shop.format_favourites_report(analytics))
+                return time.perf_counter() - started
+
+            log = shop.OrderEventLog(f"log_{count}.jsonl", fsync_every=10_000)
+            log.append_many([{"order_id": order_id, "action": "Registered", "timestamp": order["time_registered"]}
+                             for order_id, order in orders])
+
+            def order_log_pdf():
+                for name in os.listdir("."):
+                    if name.startswith(f"order_log_{count}"):
+                        os.remove(name) # Cold export every time, no checkpoint to resume from
+                started = time.perf_counter()
+                shop.StreamingReportWriter(f"order_log_{count}.pdf").render(log)
+                return time.perf_counter() - started
+
+            metrics[f"report.favourites_s@{count}"] = median_of(repeat, favourites)
+            metrics[f"report.order_log_pdf_s@{count}"] = median_of(repeat, order_log_pdf)
+            log.close()
+
+        simulated = workload(shop.SIMULATION_ORDERS, seed)
+
+        def deadline():
+            started = time.perf_counter()
+            shop.generate_pdf("deadline_report_1_2.pdf", shop.format_policy_report(shop.compare_policies(simulated)))
+            return time.perf_counter() - started
+
+        metrics["report.deadline_s"] = median_of(repeat, deadline)
+    return metrics
+
+
+# Results
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """ Print each metric against the baseline, returns the names of those that regressed by more than tolerance """
+    regressions = []
+    if baseline["meta"].get("tree_backend") != results["meta"]["tree_backend"]:
+        print("Note: Treeview backends differ, treeview.* metrics are not comparable")
+    print(f"{'metric':<36} {'baseline':>12} {'this run':>12} {'change':>8}")
+    for name, value in results["metrics"].items():
+        old = baseline["metrics"].get(name)
+        if old is None or old == 0:
+            continue
+        change = value / old - 1
+        worse = -change if name.endswith(HIGHER_IS_BETTER) else change
+        flag = ""
+        if worse > tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<36} {old:>12.4g} {value:>12.4g} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmark suite for the order workflow")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for every generated workload")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement, the median is reported")
+    parser.add_argument("--quick", action="store_true", help="Smaller workloads, for a fast check")
+    parser.add_argument("--only", nargs="+", choices=["throughput", "order_log", "session", "treeview", "reports"],
+                        help="Run just these benchmarks")
+    parser.add_argument("--output", metavar="FILE", help="Write the results as JSON")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare against an earlier --output file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before a metric counts as a regression")
+    args = parser.parse_args()
+
+    sizes = SIZES["quick" if args.quick else "full"]
+    backend, tk_root, tree_factory = make_tree() # Before stub_tk, which replaces the app's tkinter
+    stub_tk()
+    benchmarks = {
+        "throughput": lambda: bench_throughput(sizes, args.seed, args.repeat),
+        "order_log": lambda: bench_order_log(sizes, args.seed, args.repeat),
+        "session": lambda: bench_session(sizes, args.seed, args.repeat),
+        "treeview": lambda: bench_treeview(sizes, args.seed, args.repeat, tree_factory),
+        "reports": lambda: bench_reports(sizes, args.seed, args.repeat),
+    }
+    metrics = {}
+    for name, run in benchmarks.items():
+        if args.only and name not in args.only:
+            continue
+        started = time.perf_counter()
+        results = run()
+        metrics.update(results)
+        print(f"{name}: {time.perf_counter() - started:.1f}s")
+        for metric, value in results.items():
+            print(f"  {metric:<34} {value:>12.4g}")
+    if tk_root is not None:
+        tk_root.destroy()
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "sizes": "quick" if args.quick else "full",
+            "tree_backend": backend,
+            "time_scale": TIME_SCALE,
+        },
+        "metrics": metrics,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regressions beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
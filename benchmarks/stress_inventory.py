@@ -0,0 +1,108 @@
+# Stress check: InventoryManager under 64 contending threads
+# Run from the repository root: python benchmarks/stress_inventory.py [--threads 64] [--ops 2000]
+# Exits non-zero if stock is ever oversold or reservations do not add up.
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pizza_shop_app_1_2_20007495 as shop
+
+INGREDIENTS = ["dough", "sauce", "toppings", "cheese", "basil"]
+CAPACITY = 50
+
+
+def random_needs(rng):
+    picked = rng.sample(INGREDIENTS, rng.randint(1, len(INGREDIENTS)))
+    return {ingredient: rng.randint(1, 4) for ingredient in picked}
+
+
+def worker(inventory, seed, ops, totals, errors, barrier):
+    """ Mix of reserve/commit, reserve/release, batch reservations and replenishment. """
+    rng = random.Random(seed)
+    consumed = {ingredient: 0 for ingredient in INGREDIENTS}
+    replenished = {ingredient: 0 for ingredient in INGREDIENTS}
+    barrier.wait()
+    for _ in range(ops):
+        roll = rng.random()
+        if roll < 0.6:
+            needs = random_needs(rng)
+            reservation_id = inventory.reserve(needs)
+            if reservation_id is None:
+                continue
+            if rng.random() < 0.7:
+                if not inventory.commit(reservation_id):
+                    errors.append(f"commit of live reservation {reservation_id} failed")
+                for ingredient, amount in needs.items():
+                    consumed[ingredient] += amount
+            elif not inventory.release(reservation_id):
+                errors.append(f"release of live reservation {reservation_id} failed")
+            if inventory.commit(reservation_id) or inventory.release(reservation_id):
+                errors.append(f"reservation {reservation_id} settled twice")
+        elif roll < 0.8:
+            batch = [random_needs(rng) for _ in range(rng.randint(2, 8))]
+            for needs, reservation_id in zip(batch, inventory.reserve_batch(batch)):
+                if reservation_id is None:
+                    continue
+                inventory.commit(reservation_id)
+                for ingredient, amount in needs.items():
+                    consumed[ingredient] += amount
+        else:
+            ingredient = rng.choice(INGREDIENTS)
+            message = inventory.replenish(ingredient) # "Replenished <ingredient> from <before> to <capacity>"
+            if message is not None:
+                before = int(message.split(" from ")[1].split(" to ")[0])
+                replenished[ingredient] += CAPACITY - before
+    totals.append((consumed, replenished))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="InventoryManager contention stress check")
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--ops", type=int, default=2000, help="Operations per thread")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    inventory = shop.InventoryManager({ingredient: CAPACITY for ingredient in INGREDIENTS}, capacity=CAPACITY)
+    totals, errors = [], []
+    barrier = threading.Barrier(args.threads)
+    threads = [
+        threading.Thread(target=worker, args=(inventory, args.seed * 1000 + i, args.ops, totals, errors, barrier))
+        for i in range(args.threads)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    final = inventory.snapshot()
+    for ingredient in INGREDIENTS:
+        consumed = sum(c[ingredient] for c, _ in totals)
+        replenished = sum(r[ingredient] for _, r in totals)
+        expected = CAPACITY - consumed + replenished
+        if final[ingredient] != expected:
+            errors.append(f"{ingredient}: stock {final[ingredient]}, expected {expected}")
+        if final[ingredient] < 0:
+            errors.append(f"{ingredient}: oversold to {final[ingredient]}")
+        if inventory.available(ingredient) != final[ingredient]:
+            errors.append(f"{ingredient}: {final[ingredient] - inventory.available(ingredient)} still reserved")
+    if len(totals) != args.threads:
+        errors.append(f"only {len(totals)} of {args.threads} threads finished")
+
+    total_ops = args.threads * args.ops
+    print(f"{args.threads} threads x {args.ops} ops in {elapsed:.2f}s ({total_ops / elapsed:,.0f} ops/s), final stock {final}")
+    for error in errors[:20]:
+        print(f"FAIL: {error}")
+    if errors:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,23 @@
 # 20007495 Assessment Part 1.2 
 # Core imports and constants 
+# Heavy modules (fpdf, webbrowser, asyncio, concurrent.futures, sqlite3) are imported where first needed to keep startup fast 
+import time
+_MODULE_STARTED = time.perf_counter() # For --profile-startup
 import os
-import webbrowser
 import json
 import threading
-import time
 import random
+import heapq
+import bisect
+import itertools
+import functools
+import math
+import contextlib
 import tkinter as tk
 from tkinter import Tk, ttk, messagebox
-from datetime import datetime
-from fpdf import FPDF
-from queue import Queue, Empty
-from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from queue import Queue, Empty, Full
+from collections import deque
 
 # Constants 
 
@@ -56,14 +62,405 @@ PIZZA_TYPES = [
 ]
 SIZES = ["Small", "Medium", "Large"]
 
-# Threading locks 
-inventory_lock = threading.Lock()
-order_queue = Queue()
-collection_queue = Queue()
-
 # Thread-safe flag for stopping threads (Graceful termination)
 stop_flag = threading.Event()
 
+# Tracing 
+TRACE_FILE = "trace_1_2.json" # Chrome trace-event JSON, open it in chrome://tracing or ui.perfetto.dev
+TRACE_MAX_EVENTS = 200_000 # Oldest events are dropped past this, so a long traced session stays bounded
+PROFILE_FILE = "profile_1_2.prof"
+PROFILE_TOGGLE_KEY = "<F9>"
+
+class Tracer:
+    """ Span timings for --trace, written as Chrome trace events. While disabled a traced call costs one
+    attribute check. Spans on one thread are complete ("X") events, work that runs across awaits
+    (an order going through the kitchen) is an async ("b"/"e") pair keyed by order id. """
+    def __init__(self):
+        self.enabled = False
+        self.events = deque(maxlen=TRACE_MAX_EVENTS)
+        self._threads = {} # Thread ident -> name, for the trace's thread labels
+        self._origin = time.perf_counter()
+        self._profiler = None
+
+    def start(self):
+        self.events.clear()
+        self._origin = time.perf_counter()
+        self.enabled = True
+
+    def _us(self, seconds):
+        return round((seconds - self._origin) * 1e6, 1)
+
+    # Time Complexity O(1), deque appends are thread-safe 
+    def complete(self, name, category, start, end, args=None):
+        """ Record a span that ran from start to end (time.perf_counter values) on the calling thread """
+        thread = threading.current_thread()
+        self._threads.setdefault(thread.ident, thread.name)
+        event = {"name": name, "cat": category, "ph": "X", "ts": self._us(start), "dur": round((end - start) * 1e6, 1),
+                 "pid": os.getpid(), "tid": thread.ident}
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def async_span(self, name, category, span_id, start, end):
+        for phase, seconds in (("b", start), ("e", end)):
+            self.events.append({"name": name, "cat": category, "ph": phase, "ts": self._us(seconds),
+                                "id": str(span_id), "pid": os.getpid(), "tid": 0})
+
+    @contextlib.contextmanager
+    def span(self, name, category, **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.complete(name, category, start, time.perf_counter(), args)
+
+    def write(self, filename=TRACE_FILE):
+        """ Write the trace file, returns the number of events in it """
+        events = list(self.events)
+        names = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": ident, "args": {"name": name}}
+                 for ident, name in list(self._threads.items())]
+        with open(filename, "w") as f:
+            json.dump({"traceEvents": names + events, "displayTimeUnit": "ms"}, f)
+        return len(events)
+
+    def toggle_profile(self, filename=PROFILE_FILE):
+        """ Start cProfile on the calling thread, or stop it, write the stats and print the top functions """
+        import cProfile
+        import pstats
+        if self._profiler is None:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+            return "Profiling started"
+        profiler, self._profiler = self._profiler, None
+        profiler.disable()
+        profiler.dump_stats(filename)
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(15)
+        return f"Profile written to {filename}"
+
+    @property
+    def profiling(self):
+        return self._profiler is not None
+
+tracer = Tracer()
+
+def traced(category, name=None):
+    """ Decorator recording a span around every call while tracing is on """
+    def decorate(func):
+        label = name or func.__name__
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(label, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+class TracedLock:
+    """ threading.Lock that, while tracing, records how long every contended acquire waited.
+    An uncontended acquire takes the fast path and records nothing. """
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+
+    def acquire(self, blocking=True, timeout=-1):
+        if self._lock.acquire(False):
+            return True
+        if not blocking:
+            return False
+        if not tracer.enabled:
+            return self._lock.acquire(True, timeout)
+        start = time.perf_counter()
+        acquired = self._lock.acquire(True, timeout)
+        tracer.complete(f"wait {self.name}", "lock", start, time.perf_counter(), {"lock": self.name})
+        return acquired
+
+    def release(self):
+        self._lock.release()
+
+    def locked(self):
+        return self._lock.locked()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+# Inventory 
+class InventoryManager:
+    """ Ingredient stock with one lock per ingredient (sharded) instead of a single global inventory lock.
+    reserve() takes the locks for just the ingredients it needs, always in sorted order, so a multi-ingredient
+    reservation is atomic and two reservations can never deadlock. Reserved stock is held back until it is
+    commit()ted (used) or release()d (returned). """
+    def __init__(self, stock, capacity=MAX_INGREDIENTS):
+        self.capacity = capacity
+        self._stock = dict(stock)
+        self._reserved = {ingredient: 0 for ingredient in stock}
+        self._locks = {ingredient: TracedLock(f"inventory_lock[{ingredient}]") for ingredient in stock}
+        self._reservations = {} # reservation id -> {ingredient: amount}
+        self._reservation_ids = itertools.count(1)
+
+    def _lock_all(self, ingredients):
+        # Fixed global order is what makes multi-ingredient locking deadlock-free
+        locks = [self._locks[ingredient] for ingredient in sorted(ingredients)]
+        for lock in locks:
+            lock.acquire()
+        return locks
+
+    @staticmethod
+    def _unlock_all(locks):
+        for lock in reversed(locks):
+            lock.release()
+
+    def stock(self, ingredient):
+        return self._stock[ingredient]
+
+    def available(self, ingredient):
+        """ Stock not already promised to a reservation """
+        return self._stock[ingredient] - self._reserved[ingredient]
+
+    def snapshot(self):
+        locks = self._lock_all(self._stock)
+        try:
+            return dict(self._stock)
+        finally:
+            self._unlock_all(locks)
+
+    def shortfall(self, needs):
+        """ Ingredients that cannot currently cover needs """
+        return [ingredient for ingredient, amount in needs.items() if self.available(ingredient) < amount]
+
+    def _reserve_locked(self, needs, allow_overdraw):
+        if not allow_overdraw and any(self.available(ingredient) < amount for ingredient, amount in needs.items()):
+            return None
+        for ingredient, amount in needs.items():
+            self._reserved[ingredient] += amount
+        reservation_id = next(self._reservation_ids)
+        self._reservations[reservation_id] = dict(needs)
+        return reservation_id
+
+    # Time Complexity O(k) for k ingredients 
+    def reserve(self, needs, allow_overdraw=False):
+        """ Atomically hold back every ingredient in needs. Returns a reservation id, or None if any is short.
+        allow_overdraw lets stock go negative, as it did for orders bigger than a full shelf. """
+        locks = self._lock_all(needs)
+        try:
+            return self._reserve_locked(needs, allow_overdraw)
+        finally:
+            self._unlock_all(locks)
+
+    # Time Complexity O(n k) for n orders, all ingredient locks are taken once for the whole batch 
+    def reserve_batch(self, needs_list):
+        """ Reserve for many orders in one pass, in order. Returns a reservation id or None per order. """
+        locks = self._lock_all(self._stock)
+        try:
+            return [self._reserve_locked(needs, False) for needs in needs_list]
+        finally:
+            self._unlock_all(locks)
+
+    def _settle(self, reservation_id, consume):
+        needs = self._reservations.get(reservation_id)
+        if needs is None:
+            return False
+        locks = self._lock_all(needs)
+        try:
+            if self._reservations.pop(reservation_id, None) is None:
+                return False # Settled by another thread in the meantime
+            for ingredient, amount in needs.items():
+                self._reserved[ingredient] -= amount
+                if consume:
+                    self._stock[ingredient] -= amount
+            return True
+        finally:
+            self._unlock_all(locks)
+
+    def commit(self, reservation_id):
+        """ The reserved ingredients have been used """
+        return self._settle(reservation_id, consume=True)
+
+    def release(self, reservation_id):
+        """ Give the reserved ingredients back, e.g. the order failed """
+        return self._settle(reservation_id, consume=False)
+
+    def replenish(self, ingredient, amount=None):
+        """ Add amount of an ingredient (default: top up to capacity), never above capacity.
+        Returns a log message, or None if nothing was done. """
+        with self._locks[ingredient]:
+            current_amount = self._stock[ingredient]
+            if current_amount >= self.capacity:
+                return None
+            new_amount = self.capacity if amount is None else min(self.capacity, current_amount + amount)
+            self._stock[ingredient] = new_amount
+            return f"Replenished {ingredient} from {current_amount} to {new_amount}"
+
+inventory = InventoryManager(INGREDIENTS)
+
+# Bill of materials: ingredients per pizza of each size, adjusted by pizza type 
+PIZZA_RECIPES = {
+    "small": {"dough": 1, "sauce": 1, "toppings": 2},
+    "medium": {"dough": 2, "sauce": 1, "toppings": 3},
+    "large": {"dough": 3, "sauce": 2, "toppings": 4},
+}
+PIZZA_TYPE_ADJUSTMENTS = {
+    "Chef Sagir's Special": {"toppings": 1},
+    "Meat Feast": {"toppings": 1},
+    "Margherita": {"toppings": -1},
+    "Margherita (Vegan)": {"toppings": -1},
+}
+
+class BillOfMaterials:
+    """ Table-driven recipes: every (pizza type, size) is one row of an ingredient matrix.
+    Requirements for a batch of orders are one product, order counts per row x the matrix, so planning for
+    thousands of queued orders costs one pass over them. Uses NumPy when installed (unless pure_stdlib),
+    otherwise the same product in plain Python. The matrix is built on first use to keep startup fast. """
+    def __init__(self, recipes=PIZZA_RECIPES, adjustments=PIZZA_TYPE_ADJUSTMENTS, pizza_types=PIZZA_TYPES, pure_stdlib=False):
+        self.ingredients = sorted({ingredient for recipe in recipes.values() for ingredient in recipe})
+        self.rows = {} # (pizza type, size) -> row, pizza type None is the plain recipe for unlisted types
+        self._table = []
+        for size, recipe in recipes.items():
+            for pizza_type in [None, *pizza_types]:
+                adjustment = adjustments.get(pizza_type, {})
+                self.rows[(pizza_type, size)] = len(self._table)
+                self._table.append([max(0, recipe.get(ingredient, 0) + adjustment.get(ingredient, 0))
+                                    for ingredient in self.ingredients])
+        self.pure_stdlib = pure_stdlib
+        self._np = None
+        self._matrix = None
+
+    def _numpy(self):
+        if self._matrix is None and not self.pure_stdlib:
+            try:
+                import numpy
+            except ImportError:
+                self.pure_stdlib = True
+            else:
+                self._np = numpy
+                self._matrix = numpy.array(self._table, dtype=numpy.int64)
+        return self._np
+
+    # Time Complexity O(1) 
+    def row(self, pizza_type, size):
+        size = str(size).lower()
+        row = self.rows.get((pizza_type, size))
+        if row is None:
+            row = self.rows.get((None, size))
+        if row is None:
+            raise ValueError(f"Invalid size {size}")
+        return row
+
+    # Time Complexity O(k) for k ingredients 
+    def needs(self, order):
+        """ Ingredients one order will use """
+        quantity = int(order["quantity"])
+        vector = self._table[self.row(order["pizza_type"], order["size"])]
+        return {ingredient: amount * quantity for ingredient, amount in zip(self.ingredients, vector)}
+
+    # Time Complexity O(n + r k) for n orders over r recipe rows 
+    def requirements(self, orders):
+        """ Total ingredients for a batch of orders """
+        rows, quantities = [], []
+        for order in orders:
+            rows.append(self.row(order["pizza_type"], order["size"]))
+            quantities.append(int(order["quantity"]))
+        np = self._numpy()
+        if np is not None:
+            counts = np.bincount(np.asarray(rows, dtype=np.int64), weights=quantities, minlength=len(self._table))
+            totals = counts.astype(np.int64) @ self._matrix
+            return {ingredient: int(total) for ingredient, total in zip(self.ingredients, totals)}
+        counts = [0] * len(self._table)
+        for row, quantity in zip(rows, quantities):
+            counts[row] += quantity
+        totals = [0] * len(self.ingredients)
+        for count, vector in zip(counts, self._table):
+            if count:
+                for i, amount in enumerate(vector):
+                    totals[i] += count * amount
+        return dict(zip(self.ingredients, totals))
+
+recipe_book = BillOfMaterials()
+
+# Restock once projected stock falls below these, i.e. it could no longer cover a medium pizza 
+LOW_WATER_MARKS = dict(PIZZA_RECIPES["medium"])
+
+class ReplenishmentScheduler:
+    """ Keeps stock topped up ahead of demand instead of polling for empty shelves.
+    The thread sleeps on a Condition and only wakes when an order is expected, an order has used stock or
+    someone calls notify(). Each wake compares available stock minus the forecast demand of every order already
+    queued against the low-water marks, so an ingredient is restocked before the order that needs it reaches the oven. """
+    def __init__(self, inventory, low_water=None, on_replenish=None, recipes=None):
+        self.inventory = inventory
+        self.recipes = recipe_book if recipes is None else recipes
+        self.low_water = dict(LOW_WATER_MARKS if low_water is None else low_water)
+        self.on_replenish = on_replenish # Called with (ingredient, message) after each restock
+        self.replenishments = 0
+        self._wakeup = threading.Condition()
+        self._forecast = {} # order id -> queued order, its ingredients come from the bill of materials
+        self._dirty = False
+        self._stopping = False
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="replenishment", daemon=True)
+            self._thread.start()
+
+    def notify(self):
+        """ Stock or demand changed, re-check the low-water marks """
+        with self._wakeup:
+            self._dirty = True
+            self._wakeup.notify()
+
+    def expect(self, order_id, order):
+        """ An order has been queued, count its ingredients in the forecast. ValueError for an unknown size. """
+        self.recipes.row(order["pizza_type"], order["size"])
+        with self._wakeup:
+            self._forecast[order_id] = order
+            self._dirty = True
+            self._wakeup.notify()
+
+    def fulfilled(self, order_id):
+        """ The order has taken its ingredients (or failed), drop it from the forecast """
+        with self._wakeup:
+            self._forecast.pop(order_id, None)
+            self._dirty = True
+            self._wakeup.notify()
+
+    # Time Complexity O(n) for n queued orders, see BillOfMaterials.requirements 
+    def forecast_demand(self):
+        with self._wakeup:
+            queued = list(self._forecast.values())
+        return self.recipes.requirements(queued)
+
+    def check(self, demand):
+        """ Restock every ingredient whose stock, less the forecast demand, is below its low-water mark """
+        for ingredient, mark in self.low_water.items():
+            if self.inventory.available(ingredient) - demand.get(ingredient, 0) < mark:
+                message = self.inventory.replenish(ingredient)
+                if message is not None:
+                    self.replenishments += 1
+                    if self.on_replenish is not None:
+                        self.on_replenish(ingredient, message)
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                while not self._dirty and not self._stopping:
+                    self._wakeup.wait() # No timeout: an idle kitchen costs no CPU
+                if self._stopping:
+                    return
+                self._dirty = False
+                queued = list(self._forecast.values())
+            self.check(self.recipes.requirements(queued))
+
+    def stop(self, timeout=1.0):
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
 # Constants for file storage 
 SESSION_FILE = "session_data_1_2.json"
 PARTIAL_SELECTION_FILE = "partial_selection_1_2.json"
@@ -71,19 +468,15 @@ PARTIAL_SELECTION_FILE = "partial_selection_1_2.json"
 # Session management functions
 # Time Complexity O(n) where n is size of orders dictionary 
 # Space Complexity O(n) for serialization 
+@traced("io")
 def save_session(orders, next_order_id, partial_selection=None):
     """ Handles atomic saving of session data with custom datetime serialization. 
     Uses a temporary file for atomic writing to tackle data corruption."""
-    def custom_serializer(obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        raise TypeError(f"Type {type(obj)} not serializable")
-    
     session_data = {"orders": orders, "next_order_id": next_order_id, "partial_selection": partial_selection}
     temp_file = f"{SESSION_FILE}.tmp"
     try:
         with open(temp_file, "w") as f:
-            json.dump(session_data, f, default=custom_serializer)
+            json.dump(session_data, f, default=json_default)
         os.replace(temp_file, SESSION_FILE) # Atomic replacemnt 
     except Exception as e:
         if os.path.exists(temp_file):
@@ -94,7 +487,8 @@ def save_session(orders, next_order_id, partial_selection=None):
 # Space Complexity: O(n) where n is file size
 def load_session():
     """Loads and deserializaes session data with datetime parsing. 
-    Handles corrupted files by creating a new session. """
+    Handles corrupted files by creating a new session, flagged with "load_error" for the caller to report
+    (this may run off the Tk thread, so no dialog is shown here). """
     def custom_deserializer(dct):
         for key, value in dct.items():
             if isinstance(value, str) and value.endswith("Z") and "T" in value:
@@ -109,17 +503,205 @@ def load_session():
             with open(SESSION_FILE, "r") as f:
                 return json.load(f, object_hook=custom_deserializer)
         except (json.JSONDecodeError, ValueError):
-            messagebox.showerror(
-                "Session Load Error",
-                "The session data file is corrupted. Starting with a clean session.",
-            )
             os.remove(SESSION_FILE)
+            return {"orders": {}, "next_order_id": 1, "partial_selection": {},
+                    "load_error": "The session data file is corrupted. Starting with a clean session."}
     return {"orders": {}, "next_order_id": 1, "partial_selection": {}}
 
+# Incremental session persistence 
+SESSION_DELTA_FILE = "session_data_1_2.deltas.jsonl"
+PARTIAL_SAVE_DELAY = 0.5 # Seconds of quiet before a partial selection is written
+SESSION_COMPACT_EVERY = 500 # Deltas appended before the full snapshot is rewritten
+ANALYTICS_FILE = "analytics_1_2.json"
+ANALYTICS_SAVE_DELAY = 2.0 # Seconds of quiet before the running order analytics are written
+
+def set_aside_session_files(suffix=".unreadable"):
+    """ Rename the session snapshot and delta log out of the way so the next load starts clean but nothing is lost. """
+    moved = []
+    for path in (SESSION_FILE, SESSION_DELTA_FILE):
+        if os.path.exists(path):
+            os.replace(path, path + suffix)
+            moved.append(path + suffix)
+    return moved
+
+def json_default(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Type {type(obj)} not serializable")
+
+def normalise_order_id(order_id):
+    # JSON object keys are always strings, new orders use int ids
+    return int(order_id) if isinstance(order_id, str) and order_id.isdigit() else order_id
+
+class SessionStore:
+    """ Session persistence in three parts:
+    - the full snapshot (SESSION_FILE, same format as save_session) rewritten only on compaction,
+    - an append-only delta log of new orders and status changes, one JSON line each,
+    - the partial selection in its own small file, written after PARTIAL_SAVE_DELAY seconds of quiet,
+    - the running order analytics, likewise in their own file after ANALYTICS_SAVE_DELAY seconds of quiet.
+    snapshot_source() must return (orders, next_order_id) and is only called when compacting. """
+    def __init__(self, snapshot_source=None, delta_file=SESSION_DELTA_FILE, partial_file=PARTIAL_SELECTION_FILE,
+                 partial_delay=PARTIAL_SAVE_DELAY, compact_every=SESSION_COMPACT_EVERY,
+                 analytics_file=ANALYTICS_FILE, analytics_delay=ANALYTICS_SAVE_DELAY):
+        self.snapshot_source = snapshot_source
+        self.delta_file = delta_file
+        self.partial_file = partial_file
+        self.partial_delay = partial_delay
+        self.compact_every = compact_every
+        self._lock = threading.Lock()
+        self._deltas = None # Open delta log
+        self._delta_count = 0
+        self._partial_timer = None
+        self._pending_partial = None
+        self.analytics_file = analytics_file
+        self.analytics_delay = analytics_delay
+        self._analytics_timer = None
+        self._analytics_source = None
+
+    # Time Complexity O(n + d) where d is deltas since the last compaction 
+    def load(self):
+        """ Snapshot plus replayed deltas plus the separate partial selection, as a load_session style dict. """
+        session_data = load_session()
+        orders = {normalise_order_id(order_id): order for order_id, order in session_data["orders"].items()}
+        next_order_id = session_data["next_order_id"]
+        if os.path.exists(self.delta_file):
+            with open(self.delta_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        delta = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue # Torn final line after a crash
+                    if not isinstance(delta, dict) or delta.get("id") is None:
+                        continue # Malformed delta, skipped like a torn line
+                    op, order_id = delta.get("op"), delta["id"]
+                    if op == "order" and isinstance(delta.get("order"), dict):
+                        orders[order_id] = delta["order"]
+                        next_order_id = max(next_order_id, delta.get("next_order_id", next_order_id))
+                    elif op == "status" and "status" in delta:
+                        if order_id in orders:
+                            orders[order_id]["status"] = delta["status"]
+                            if "time_collected" in delta:
+                                orders[order_id]["time_collected"] = delta["time_collected"]
+                    else:
+                        continue # Unknown op or missing order/status
+                    self._delta_count += 1
+        partial_selection = self.load_partial_selection() or session_data.get("partial_selection") or {}
+        return {"orders": orders, "next_order_id": next_order_id, "partial_selection": partial_selection,
+                "load_error": session_data.get("load_error")}
+
+    def _append(self, delta):
+        line = json.dumps(delta, separators=(",", ":"), default=json_default) + "\n"
+        with self._lock:
+            if self._deltas is None:
+                self._deltas = open(self.delta_file, "a", encoding="utf-8")
+            self._deltas.write(line)
+            self._deltas.flush()
+            self._delta_count += 1
+            due = self._delta_count >= self.compact_every
+        if due:
+            self.compact()
+
+    # Time Complexity O(1) amortised, compaction is O(n) once every SESSION_COMPACT_EVERY deltas 
+    def record_order(self, order_id, order, next_order_id):
+        self._append({"op": "order", "id": order_id, "order": order, "next_order_id": next_order_id})
+
+    def record_status(self, order_id, status, time_collected=None):
+        delta = {"op": "status", "id": order_id, "status": status}
+        if time_collected is not None:
+            delta["time_collected"] = time_collected
+        self._append(delta)
+
+    def compact(self):
+        """ Rewrite the full snapshot and start a fresh delta log. """
+        if self.snapshot_source is None:
+            return
+        with self._lock:
+            orders, next_order_id = self.snapshot_source()
+            save_session(orders, next_order_id, self.load_partial_selection())
+            if self._deltas is not None:
+                self._deltas.close()
+                self._deltas = None
+            if os.path.exists(self.delta_file):
+                os.remove(self.delta_file)
+            self._delta_count = 0
+
+    # Debounced partial selection 
+    def save_partial_selection(self, partial_selection):
+        """ Called on every keystroke or click, only the last value in a burst reaches the disk. """
+        with self._lock:
+            self._pending_partial = partial_selection
+            if self._partial_timer is not None:
+                self._partial_timer.cancel()
+            self._partial_timer = threading.Timer(self.partial_delay, self.flush_partial_selection)
+            self._partial_timer.daemon = True
+            self._partial_timer.start()
+
+    def flush_partial_selection(self):
+        with self._lock:
+            partial_selection, self._pending_partial = self._pending_partial, None
+            if self._partial_timer is not None:
+                self._partial_timer.cancel()
+                self._partial_timer = None
+        if partial_selection is None:
+            return
+        temp_file = f"{self.partial_file}.tmp"
+        with open(temp_file, "w") as f:
+            json.dump(partial_selection, f)
+        os.replace(temp_file, self.partial_file) # Atomic replacemnt 
+
+    def load_partial_selection(self):
+        if os.path.exists(self.partial_file):
+            try:
+                with open(self.partial_file, "r") as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, ValueError):
+                pass
+        return None
+
+    # Debounced analytics 
+    def save_analytics(self, snapshot_source):
+        """ Called on every analytics update, snapshot_source() is only called once the burst is over. """
+        with self._lock:
+            self._analytics_source = snapshot_source
+            if self._analytics_timer is None:
+                self._analytics_timer = threading.Timer(self.analytics_delay, self.flush_analytics)
+                self._analytics_timer.daemon = True
+                self._analytics_timer.start()
+
+    def flush_analytics(self):
+        with self._lock:
+            snapshot_source, self._analytics_source = self._analytics_source, None
+            if self._analytics_timer is not None:
+                self._analytics_timer.cancel()
+                self._analytics_timer = None
+        if snapshot_source is None:
+            return
+        temp_file = f"{self.analytics_file}.tmp"
+        with open(temp_file, "w") as f:
+            json.dump(snapshot_source(), f)
+        os.replace(temp_file, self.analytics_file)
+
+    def load_analytics(self):
+        if os.path.exists(self.analytics_file):
+            try:
+                with open(self.analytics_file, "r") as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, ValueError):
+                pass
+        return None
+
+    def close(self):
+        """ Write any pending partial selection and analytics, then compact so the next start reads a single snapshot. """
+        self.flush_partial_selection()
+        self.flush_analytics()
+        self.compact()
+
 # PDF Generation Functions 
 # Time Complexity O(n) where n is number of content lines
+@traced("io")
 def generate_pdf(filename, content):
     """Utility function to generate a PDF."""
+    from fpdf import FPDF # Deferred until the first report is requested
     pdf = FPDF()
     pdf.add_page()
     pdf.set_font("Arial", size=12)
@@ -134,37 +716,2103 @@ def generate_pdf(filename, content):
             os.startfile(filename) 
     except (AttributeError, OSError):
         # Fallback to webbrowser for other platforms
+        import webbrowser
         webbrowser.open(filename) 
 
 # Order logging 
-# Time Complexity O(n) where n is number of log entries
-# Space Complexity O(n)
+# Constants for the order event log 
+ORDER_LOG_FILE = "order_log_1_2.jsonl"
+LEGACY_ORDER_LOG_FILE = "order_log_1_2.json" # Old rewrite-everything format, migrated on first use
+ORDER_LOG_PDF = "order_log_1_2.pdf"
+LOG_FSYNC_EVERY = 50 # fsync after this many events...
+LOG_FSYNC_INTERVAL = 1.0 # ...or after this many seconds, whichever comes first
+
+class OrderEventLog:
+    """ Append-only order event log stored as JSON Lines (one compact entry per line).
+    Appending never re-reads or rewrites history, and fsync is batched so each status change is O(1). """
+    def __init__(self, path=ORDER_LOG_FILE, fsync_every=LOG_FSYNC_EVERY, fsync_interval=LOG_FSYNC_INTERVAL):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _open(self):
+        # Lazily open in append mode so importing the module never touches the disk
+        if self._file is None:
+            self._migrate_legacy_log()
+            self._file = open(self.path, "a", encoding="utf-8")
+        return self._file
+
+    def _migrate_legacy_log(self):
+        # One-off O(n) conversion of the old order_log_1_2.json list into JSON Lines
+        if os.path.exists(self.path) or not os.path.exists(LEGACY_ORDER_LOG_FILE):
+            return
+        try:
+            with open(LEGACY_ORDER_LOG_FILE, "r") as f:
+                legacy_entries = json.load(f)
+        except (json.JSONDecodeError, ValueError):
+            return
+        with open(self.path, "w", encoding="utf-8") as f:
+            for entry in legacy_entries:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        os.replace(LEGACY_ORDER_LOG_FILE, f"{LEGACY_ORDER_LOG_FILE}.migrated")
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    # Time Complexity O(1) per event 
+    def append(self, order_id, action, timestamp=None):
+        self.append_many([{"order_id": order_id, "action": action, "timestamp": timestamp or datetime.now().isoformat()}])
+
+    # Time Complexity O(k) for k entries, written with a single write and flush 
+    @traced("io", "OrderEventLog.append_many")
+    def append_many(self, entries):
+        lines = "".join(json.dumps(entry, separators=(",", ":"), default=str) + "\n" for entry in entries)
+        if not lines:
+            return
+        with self._lock:
+            f = self._open()
+            f.write(lines)
+            f.flush() # Hand the lines to the OS straight away, the expensive fsync is batched below
+            self._unsynced += len(entries)
+            if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+
+    def sync_due(self):
+        """ True once unsynced events have waited fsync_interval, for writers that go idle before the next append. """
+        return self._unsynced > 0 and time.monotonic() - self._last_sync >= self.fsync_interval
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None and self._unsynced:
+                self._sync()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                if self._unsynced:
+                    self._sync()
+                self._file.close()
+                self._file = None
+
+    # Time Complexity O(n) but Space Complexity O(1), entries are read as a stream 
+    def iter_entries(self):
+        """ Yields log entries one at a time. A torn final line (e.g. after a crash) is skipped. """
+        for entry, _ in self.iter_entries_from(0):
+            yield entry
+
+    def iter_entries_from(self, offset):
+        """ Yields (entry, next_offset) pairs starting at a byte offset, so readers can resume where they stopped. """
+        self.flush()
+        if not os.path.exists(self.path):
+            self._migrate_legacy_log()
+            if not os.path.exists(self.path):
+                return
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for line in iter(f.readline, b""):
+                if not line.endswith(b"\n"):
+                    break # Torn final line, leave it for the next reader
+                next_offset = f.tell()
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line), next_offset
+                except json.JSONDecodeError:
+                    continue
+
+    def size(self):
+        self.flush()
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+order_event_log = OrderEventLog()
+
+# Streaming report writer 
+REPORT_VOLUME_ENTRIES = 2000 # Lines per PDF volume, this bounds the memory FPDF holds at any time
+
+def format_log_entry(entry):
+    return f"Order {entry['order_id']} {entry['action']} at {entry['timestamp']}"
+
+class StreamingReportWriter:
+    """ Renders a JSON Lines log into a series of PDF volumes (name_part001.pdf, name_part002.pdf, ...).
+    Each volume is written to disk as soon as it is full, so memory stays bounded by REPORT_VOLUME_ENTRIES.
+    A checkpoint records the log offset after the last sealed volume, so a re-export only renders new entries
+    plus the open tail volume. """
+    def __init__(self, base_filename=ORDER_LOG_PDF, title="Order Log", format_entry=format_log_entry,
+                 entries_per_volume=REPORT_VOLUME_ENTRIES, checkpoint_file=None):
+        self.stem, self.ext = os.path.splitext(base_filename)
+        self.title = title
+        self.format_entry = format_entry
+        self.entries_per_volume = entries_per_volume
+        self.checkpoint_file = checkpoint_file or f"{self.stem}.checkpoint.json"
+
+    def volume_filename(self, index):
+        return f"{self.stem}_part{index:03d}{self.ext}"
+
+    def _load_checkpoint(self, log):
+        checkpoint = {"source": log.path, "offset": 0, "volumes": 0, "entries": 0}
+        if os.path.exists(self.checkpoint_file):
+            try:
+                with open(self.checkpoint_file, "r") as f:
+                    saved = json.load(f)
+                # Only trust the checkpoint if it belongs to this log and the log has not been truncated since
+                if saved.get("source") == log.path and saved.get("offset", 0) <= log.size():
+                    checkpoint.update(saved)
+            except (json.JSONDecodeError, ValueError):
+                pass
+        return checkpoint
+
+    def _save_checkpoint(self, checkpoint):
+        temp_file = f"{self.checkpoint_file}.tmp"
+        with open(temp_file, "w") as f:
+            json.dump(checkpoint, f)
+        os.replace(temp_file, self.checkpoint_file) # Atomic replacemnt 
+
+    def _start_volume(self, index):
+        from fpdf import FPDF # Deferred until the first report is requested
+        pdf = FPDF()
+        pdf.add_page()
+        pdf.set_font("Arial", size=12)
+        pdf.cell(200, 10, txt=f"{self.title} (part {index})", ln=True, align='C')
+        pdf.cell(200, 10, txt="", ln=True)  # Blank line
+        return pdf
+
+    # Time Complexity O(k + v) where k is new entries since the checkpoint and v is REPORT_VOLUME_ENTRIES
+    # Space Complexity O(v)
+    def render(self, log, resume=True):
+        """ Render the log, resuming from the checkpoint unless resume is False.
+        Returns (total entries rendered, list of volume filenames). """
+        checkpoint = self._load_checkpoint(log) if resume else {"source": log.path, "offset": 0, "volumes": 0, "entries": 0}
+        pdf = None
+        in_volume = 0
+        for entry, next_offset in log.iter_entries_from(checkpoint["offset"]):
+            if pdf is None:
+                pdf = self._start_volume(checkpoint["volumes"] + 1)
+            pdf.cell(200, 10, txt=self.format_entry(entry), ln=True, align='L')
+            in_volume += 1
+            if in_volume == self.entries_per_volume:
+                # Seal the volume: flush it to disk, drop it from memory and move the checkpoint past it
+                pdf.output(self.volume_filename(checkpoint["volumes"] + 1))
+                pdf = None
+                checkpoint["volumes"] += 1
+                checkpoint["entries"] += in_volume
+                checkpoint["offset"] = next_offset
+                in_volume = 0
+                self._save_checkpoint(checkpoint)
+
+        volumes = checkpoint["volumes"]
+        if pdf is not None:
+            # The open tail volume is rewritten on every export until it fills up
+            pdf.output(self.volume_filename(volumes + 1))
+            volumes += 1
+        self._save_checkpoint(checkpoint)
+        return checkpoint["entries"] + in_volume, [self.volume_filename(i) for i in range(1, volumes + 1)]
+
+# Time Complexity O(k) where k is entries added since the last export, see StreamingReportWriter
+def export_order_log_pdf(filename=ORDER_LOG_PDF, log=None):
+    """Render the order event log to PDF volumes. Returns (entries written, volume filenames)."""
+    return StreamingReportWriter(filename).render(log or order_event_log)
+
+# Background report writer 
+REPORT_QUEUE_SIZE = 1000 # Bounded, producers block (backpressure) rather than grow memory
+REPORT_RENDER_INTERVAL = 10.0 # Seconds, the order log PDF is re-rendered at most this often
+
+class ReportWriterThread:
+    """ Moves log and PDF I/O off the order critical path.
+    Producers enqueue events, the writer thread drains them in batches with one append_many call,
+    and re-renders the order log PDF at most once per render_interval. """
+    def __init__(self, log=None, maxsize=REPORT_QUEUE_SIZE, render_interval=REPORT_RENDER_INTERVAL, pdf_filename=ORDER_LOG_PDF):
+        self.log = log or order_event_log
+        self.render_interval = render_interval
+        self.pdf_filename = pdf_filename
+        self._queue = Queue(maxsize=maxsize)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._dirty = False # New events since the last render
+        self.written = 0 # Events appended to the log
+        self._last_render = time.monotonic()
+        self._render_lock = threading.Lock() # The writer thread and an explicit export may both render
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="report-writer", daemon=True)
+                self._thread.start()
+
+    # Time Complexity O(1) 
+    def submit(self, order_id, action):
+        """ Queue a log event, the timestamp is taken now rather than when it is written. """
+        self.start() # Started lazily on the first event
+        self._queue.put({"order_id": order_id, "action": action, "timestamp": datetime.now().isoformat()})
+
+    def _drain(self, first):
+        # Coalesce everything already waiting into one batch
+        batch = [first]
+        while len(batch) < self._queue.maxsize:
+            try:
+                item = self._queue.get_nowait()
+            except Empty:
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=0.5)
+            except Empty:
+                first = False
+                if self.log.sync_due(): # No new event to trigger the interval fsync in append_many
+                    self.log.flush()
+                if stop_flag.is_set():
+                    break
+
+            stopping = False
+            if first is not False:
+                batch = self._drain(first)
+                stopping = None in batch # Sentinel from close()
+                events = [event for event in batch if event is not None]
+                try:
+                    self.log.append_many(events)
+                    self.written += len(events)
+                    self._dirty = self._dirty or bool(events)
+                except Exception as e:
+                    print(f"Error writing order log: {e}")
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+
+            if self._dirty and time.monotonic() - self._last_render >= self.render_interval:
+                self._render()
+            if stopping:
+                break
+
+    def _render(self):
+        try:
+            self.render_now(wait=False)
+        except Exception as e:
+            print(f"Error rendering order log PDF: {e}")
+
+    def render_now(self, wait=True):
+        """ Render the order log PDF immediately, after waiting for queued events to be written.
+        Returns (entries written, volume filenames) as export_order_log_pdf does. """
+        if wait and self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+        with self._render_lock:
+            result = export_order_log_pdf(self.pdf_filename, self.log)
+            self._dirty = False
+            self._last_render = time.monotonic()
+        return result
+
+    def close(self, timeout=5.0):
+        """ Flush-on-shutdown: write every queued event, render the final PDF and fsync the log, all within timeout.
+        Returns how many events are still unwritten, 0 unless the writer missed the timeout. """
+        deadline = time.monotonic() + timeout
+        if self._thread is not None and self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=timeout) # The queue is bounded, never block past the deadline
+            except Full:
+                pass # Writer is stuck, it still stops on stop_flag
+            self._thread.join(max(0.0, deadline - time.monotonic()))
+        unwritten = self._queue.qsize()
+        if self._dirty and time.monotonic() < deadline: # Out of time, the next export resumes from the checkpoint
+            self._render()
+        self.log.close()
+        return unwritten
+
+report_writer = ReportWriterThread()
+
+# Time Complexity O(1) - queues the event for the background report writer 
+@traced("io")
 def order_updates_to_file(order_id, action):
-    """Log order updates to a PDF file."""
-    log_entries = []
-   
-   # If log file exists, read previous entries
-    log_file = "order_log_1_2.json"
-    if os.path.exists(log_file):
-        with open(log_file, "r") as f:
-            log_entries = json.load(f)
-
-    # Append the new log entry
-    log_entries.append({"order_id": order_id, "action": action, "timestamp": datetime.now().isoformat()})
-
-    # Save back to JSON
-    with open(log_file,  "w") as f:
-        json.dump(log_entries, f, indent=4)
-
-    # Regenerate the PDF
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", size=12) 
-    pdf.cell(200, 10, txt="Order Log", ln=True, align='C')
-    pdf.cell(200, 10, txt="", ln=True)  # Blank line
-    for entry in log_entries:
-        pdf.cell(200, 10, txt=f"Order {entry['order_id']} {entry['action']} at {entry['timestamp']}", ln=True, align='L')
-    pdf.output("order_log_1_2.pdf") # Name of the PDF
+    """Log an order update. Disk writes and PDF rendering happen on the report writer thread."""
+    report_writer.submit(order_id, action)
+
+# Kitchen pipeline 
+# Workflow stages in order, each mapped to its TASK_DURATIONS entry 
+PIPELINE_STAGES = ["register", "cook", "collect"]
+STAGE_DURATION_KEYS = {"register": "register_order", "cook": "cook_order", "collect": "collect_order"}
+# Stages that need kitchen staff; collection is the ready shelf, waiting on the customer rather than a worker 
+KITCHEN_STAGES = ["register", "cook"]
+COLLECT_STAGE = "collect"
+# Default workers per kitchen stage i.e. one till, two ovens 
+STAGE_WORKERS = {"register": 1, "cook": 2}
+
+# Time Complexity O(1) 
+def customer_pickup_delay(durations=TASK_DURATIONS, rng=random):
+    """ Simulated customer: turns up between half and one and a half times collect_order after the order is ready """
+    return durations["collect_order"] * rng.uniform(0.5, 1.5)
+
+class ReadyShelf:
+    """ Cooked orders waiting for their customer, with how long each one has been sitting there. Thread-safe. """
+    def __init__(self):
+        self._ready = {} # order_id -> time it was put on the shelf
+        self._lock = threading.Lock()
+        self.collected = 0
+        self._shelf_time = 0.0
+
+    def put(self, order_id):
+        with self._lock:
+            self._ready[order_id] = time.monotonic()
+
+    def take(self, order_id):
+        """ The customer collected it, returns the seconds it sat on the shelf (None if it was not there) """
+        with self._lock:
+            ready_at = self._ready.pop(order_id, None)
+            if ready_at is None:
+                return None
+            waited = time.monotonic() - ready_at
+            self.collected += 1
+            self._shelf_time += waited
+            return waited
+
+    def __contains__(self, order_id):
+        with self._lock:
+            return order_id in self._ready
+
+    def __len__(self):
+        with self._lock:
+            return len(self._ready)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "on_shelf": len(self._ready),
+                "collected": self.collected,
+                "average_wait": self._shelf_time / self.collected if self.collected else 0.0,
+            }
+
+HANDLER_THREADS = 4 # Small fixed pool for the blocking parts of stage handlers (inventory, UI bridge, log queue)
+
+# Oven batching: orders with the same batch key (pizza type, size) share one cook 
+BATCH_STAGE = "cook"
+BATCH_WINDOW = 0.5 # Seconds a part-filled batch waits for matching orders
+BATCH_CAPACITY = 4 # Orders per batch, 1 turns batching off
+
+def new_event_loop(pure_stdlib=False):
+    """ Use uvloop when it is installed, unless the pure-stdlib asyncio loop is requested. """
+    if not pure_stdlib:
+        try:
+            import uvloop
+            return uvloop.new_event_loop()
+        except ImportError:
+            pass
+    import asyncio
+    return asyncio.new_event_loop()
+
+# Order scheduling 
+SCHEDULING_POLICIES = ("fifo", "sjf", "edf") # First in first out, shortest job first, earliest deadline first
+DEFAULT_POLICY = "fifo"
+SIZE_WORK = {"small": 1, "medium": 2, "large": 3} # Relative effort per pizza, for shortest-job-first
+PROMISE_BASE_SECONDS = 20 # Every order is promised for collection this long after registering...
+PROMISE_PER_PIZZA_SECONDS = 5 # ...plus this much per pizza in it
+
+def registered_timestamp(order):
+    """ time_registered as seconds since the epoch, it is a datetime for new orders and a string once saved """
+    value = order.get("time_registered")
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            pass
+    return time.time()
+
+def job_size(order):
+    return SIZE_WORK.get(str(order["size"]).lower(), max(SIZE_WORK.values())) * int(order["quantity"])
+
+def promised_seconds(order):
+    """ How long after registering the order is promised for collection """
+    return PROMISE_BASE_SECONDS + PROMISE_PER_PIZZA_SECONDS * int(order["quantity"])
+
+def promised_time(order, registered=None):
+    """ Promised collection time, seconds since the epoch (or on the simulation clock if registered is given) """
+    return (registered_timestamp(order) if registered is None else registered) + promised_seconds(order)
+
+class OrderScheduler:
+    """ Turns an order into its priority under the chosen policy, smaller runs first. Arrival order breaks ties,
+    so every policy degrades to FIFO among equals. """
+    def __init__(self, policy=DEFAULT_POLICY):
+        if policy not in SCHEDULING_POLICIES:
+            raise ValueError(f"Unknown scheduling policy {policy}, expected one of {', '.join(SCHEDULING_POLICIES)}")
+        self.policy = policy
+        self._arrivals = itertools.count()
+
+    # Time Complexity O(1) 
+    def priority(self, order, registered=None):
+        arrival = next(self._arrivals)
+        if self.policy == "sjf":
+            return (job_size(order), arrival)
+        if self.policy == "edf":
+            return (promised_time(order, registered), arrival)
+        return (arrival,)
+
+class PriorityGate:
+    """ asyncio semaphore that hands a freed slot to the waiter with the smallest priority rather than the
+    longest-waiting one. KitchenPipeline uses one per stage so the scheduling policy decides who goes next. """
+    def __init__(self, slots):
+        self._free = slots
+        self._waiters = [] # Heap of [priority, sequence, future], future is None once superseded by reprioritise
+        self._sequence = itertools.count()
+        self._keyed = {} # key -> current heap entry of a waiter that acquired with a key
+
+    # Time Complexity O(log w) for w waiters 
+    async def acquire(self, priority=(), key=None):
+        """ key lets the waiter be moved forward later with reprioritise """
+        if self._free > 0 and not self._waiters:
+            self._free -= 1
+            return
+        import asyncio
+        future = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self._sequence), future]
+        heapq.heappush(self._waiters, entry)
+        if key is not None:
+            self._keyed[key] = entry
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release() # The slot was handed over just as we were cancelled, pass it on
+            raise
+        finally:
+            self._keyed.pop(key, None)
+
+    # Time Complexity O(log w) 
+    def reprioritise(self, key, priority):
+        """ Move a waiter forward if priority is more urgent than the one it is waiting with.
+        It is pushed again and its old heap entry left behind for release to skip. """
+        entry = self._keyed.get(key)
+        if entry is None or not priority < entry[0]:
+            return
+        moved = [priority, entry[1], entry[2]]
+        entry[2] = None
+        heapq.heappush(self._waiters, moved)
+        self._keyed[key] = moved
+
+    def release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if future is not None and not future.done(): # Skip superseded and cancelled waiters
+                future.set_result(None)
+                return
+        self._free += 1
+
+class KitchenPipeline:
+    """ Staged order engine: register -> cook -> collect.
+    Every order is a coroutine on one asyncio event loop running in its own thread. Each kitchen stage's worker
+    count is a semaphore, so several orders are in progress at once, throughput scales with kitchen capacity and
+    thousands of in-flight orders cost coroutines rather than OS threads.
+    Once cooked an order goes on the ready shelf and gives its oven straight back: collection waits on the
+    customer (collect(), or a simulated pickup after pickup_delay() seconds) and never holds a worker, so pickup
+    times do not cap kitchen throughput.
+    handlers[stage](order_id) runs when an order enters a stage, on_complete runs once it is collected
+    and on_error runs if a handler raises (the order then leaves the pipeline). Handlers are ordinary
+    functions, run on a small thread pool so they may block briefly.
+    Orders submitted with a batch_key are grouped at BATCH_STAGE: matching orders arriving within batch_window
+    seconds (up to batch_capacity of them) take one oven for one cook, each still gets its own handler call.
+    Each stage hands its next free worker to the waiting order with the smallest priority (see OrderScheduler),
+    orders submitted without one run in submission order. """
+    def __init__(self, handlers, on_complete=None, on_error=None, workers=None, durations=None, time_scale=1.0,
+                 pure_stdlib=False, handler_threads=HANDLER_THREADS, batch_window=BATCH_WINDOW,
+                 batch_capacity=BATCH_CAPACITY, pickup_delay=None):
+        self.handlers = handlers
+        self.on_complete = on_complete
+        self.on_error = on_error
+        self.workers = dict(STAGE_WORKERS, **(workers or {}))
+        self.durations = durations or TASK_DURATIONS
+        self.time_scale = time_scale # Benchmarks shrink the sleeps, 1.0 is real time
+        self.pure_stdlib = pure_stdlib
+        self.handler_threads = handler_threads
+        self.batch_window = batch_window
+        self.batch_capacity = batch_capacity
+        # Seconds until a simulated customer collects a ready order, None waits for collect() instead
+        self.pickup_delay = pickup_delay
+        self.shelf = ReadyShelf()
+        self._pickups = {} # order_id -> future resolved when the customer collects it
+        self._batches = {} # batch key -> the batch still open for matching orders
+        self._loop = None
+        self._thread = None
+        self._executor = None
+        self._gates = {}
+        self._submissions = itertools.count() # Default priority, i.e. FIFO
+        self._tasks = set()
+        self._stages = {} # order_id -> stage it is in ("collect" once on the shelf), for the shutdown report
+        self._stats_lock = threading.Lock()
+        self._waiting = {stage: 0 for stage in KITCHEN_STAGES} # Orders waiting for a free worker
+        self._busy = {stage: 0 for stage in KITCHEN_STAGES} # Workers currently occupied
+        self._busy_time = {stage: 0.0 for stage in KITCHEN_STAGES} # Total seconds spent working
+        self._handled = {stage: 0 for stage in KITCHEN_STAGES} # Orders that have been through the stage
+        # Called with the order id on the kitchen loop once an order is out of the kitchen (on the shelf or failed), must not block
+        self.on_settled = []
+        self.submitted = 0
+        self.shelved = 0 # Cooked and put on the ready shelf
+        self.completed = 0 # Collected by the customer
+        self.failed = 0
+        self.batches = 0
+        self.batched_orders = 0
+        self.started_at = None
+
+    def start(self):
+        if self._loop is not None:
+            return # Already running
+        from concurrent.futures import ThreadPoolExecutor
+        self.started_at = time.monotonic()
+        self._loop = new_event_loop(self.pure_stdlib)
+        self._executor = ThreadPoolExecutor(max_workers=self.handler_threads, thread_name_prefix="stage-handler")
+        self._gates = {stage: PriorityGate(self.workers[stage]) for stage in KITCHEN_STAGES}
+        self._thread = threading.Thread(target=self._loop.run_forever, name="kitchen-loop", daemon=True)
+        self._thread.start()
+
+    # Time Complexity O(1) 
+    def submit(self, order_id, handlers=None, on_complete=None, on_error=None, batch_key=None, priority=None,
+               start_stage=None):
+        """ Queue an order from any thread. handlers/on_complete/on_error override the pipeline defaults
+        for this order only, e.g. for simulated orders. batch_key, e.g. (pizza type, size), lets the order
+        share an oven with matching orders. priority comes from OrderScheduler.priority, smaller goes first.
+        start_stage resumes an order checkpointed at shutdown from that stage ("collect" puts it straight on the shelf). """
+        self.start()
+        with self._stats_lock:
+            self.submitted += 1
+            if priority is None:
+                priority = (next(self._submissions),)
+        self._loop.call_soon_threadsafe(self._spawn, order_id, handlers, on_complete, on_error, batch_key, priority,
+                                        start_stage)
+
+    def _spawn(self, order_id, handlers, on_complete, on_error, batch_key, priority, start_stage):
+        self._track(self._drive_order(order_id, handlers or self.handlers, on_complete or self.on_complete,
+                                      on_error or self.on_error, batch_key, priority, start_stage))
+
+    def _track(self, coroutine):
+        task = self._loop.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _call(self, func, *args):
+        if func is not None:
+            await self._loop.run_in_executor(self._executor, func, *args)
+
+    async def _work(self, stage, members, priority, on_start=None, gate_key=None):
+        """ One worker of the stage handles members, a list of (order_id, handlers), in a single stint.
+        on_start runs once the worker is free, after which members is final.
+        gate_key lets the wait for a worker be reprioritised, see PriorityGate.
+        Returns each member's handler exception, or None if it succeeded. """
+        import asyncio
+        gate = self._gates[stage]
+        await gate.acquire(priority, key=gate_key)
+        try:
+            if on_start is not None:
+                on_start()
+            started = time.monotonic()
+            with self._stats_lock:
+                self._waiting[stage] -= len(members)
+                self._busy[stage] += 1
+                self._handled[stage] += len(members)
+            try:
+                errors = []
+                for order_id, handlers in members:
+                    try:
+                        await self._call(handlers.get(stage), order_id)
+                        errors.append(None)
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        errors.append(e)
+                if any(error is None for error in errors):
+                    await asyncio.sleep(self.durations[STAGE_DURATION_KEYS[stage]] * self.time_scale)
+                return errors
+            finally:
+                with self._stats_lock:
+                    self._busy[stage] -= 1
+                    self._busy_time[stage] += time.monotonic() - started
+        finally:
+            gate.release()
+
+    async def _join_batch(self, batch_key, order_id, handlers, priority):
+        """ Add the order to the open batch for its key (opening one if needed) and wait for the batch to cook.
+        A batch queues for an oven when its window runs out or it fills up, and keeps taking matching orders
+        until an oven actually frees up for it. """
+        batch = self._batches.get(batch_key)
+        if batch is None:
+            batch = self._batches[batch_key] = {"key": batch_key, "members": [], "futures": [], "queued": False,
+                                                "priority": priority}
+            self._loop.call_later(self.batch_window * self.time_scale, self._queue_batch, batch)
+        future = self._loop.create_future()
+        batch["members"].append((order_id, handlers))
+        batch["futures"].append(future)
+        if priority < batch["priority"]: # A batch goes as early as its most urgent order
+            batch["priority"] = priority
+            if batch["queued"]: # Already waiting for an oven, move it up
+                self._gates[BATCH_STAGE].reprioritise(id(batch), priority)
+        if len(batch["members"]) >= self.batch_capacity:
+            self._seal_batch(batch)
+            self._queue_batch(batch)
+        return await future
+
+    def _seal_batch(self, batch):
+        """ No more orders can join the batch """
+        if self._batches.get(batch["key"]) is batch:
+            del self._batches[batch["key"]]
+
+    def _queue_batch(self, batch):
+        if not batch["queued"]:
+            batch["queued"] = True
+            self._track(self._cook_batch(batch))
+
+    async def _cook_batch(self, batch):
+        futures = batch["futures"]
+        try:
+            errors = await self._work(BATCH_STAGE, batch["members"], batch["priority"],
+                                      on_start=lambda: self._seal_batch(batch), gate_key=id(batch))
+            with self._stats_lock:
+                self.batches += 1
+                self.batched_orders += len(errors)
+            for future, error in zip(futures, errors):
+                if not future.done():
+                    future.set_result(error)
+        finally:
+            self._seal_batch(batch)
+            for future in futures:
+                if not future.done():
+                    future.cancel()
+
+    async def _drive_order(self, order_id, handlers, on_complete, on_error, batch_key=None, priority=(), start_stage=None):
+        started = time.perf_counter()
+        try:
+            await self._run_order(order_id, handlers, on_complete, on_error, batch_key, priority, start_stage)
+        finally:
+            self._stages.pop(order_id, None)
+            if tracer.enabled:
+                tracer.async_span("process_order", "kitchen", order_id, started, time.perf_counter())
+
+    async def _run_order(self, order_id, handlers, on_complete, on_error, batch_key, priority, start_stage):
+        import asyncio
+        error = None
+        stages = PIPELINE_STAGES[PIPELINE_STAGES.index(start_stage or PIPELINE_STAGES[0]):]
+        for stage in (stage for stage in stages if stage in KITCHEN_STAGES):
+            self._stages[order_id] = stage
+            with self._stats_lock:
+                self._waiting[stage] += 1
+            if stage == BATCH_STAGE and batch_key is not None and self.batch_capacity > 1:
+                error = await self._join_batch(batch_key, order_id, handlers, priority)
+            else:
+                error = (await self._work(stage, [(order_id, handlers)], priority))[0]
+            if error is not None:
+                break
+        if error is None:
+            # Out of the kitchen: on the shelf until the customer comes, holding no worker
+            self._stages[order_id] = COLLECT_STAGE
+            try:
+                await self._call(handlers.get(COLLECT_STAGE), order_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error = e
+        if error is not None:
+            with self._stats_lock:
+                self.failed += 1
+            self._settled(order_id)
+            await self._call(on_error, order_id, error)
+            return
+
+        pickup = self._loop.create_future()
+        self._pickups[order_id] = pickup
+        self.shelf.put(order_id)
+        with self._stats_lock:
+            self.shelved += 1
+        self._settled(order_id)
+        if self.pickup_delay is not None:
+            self._loop.call_later(self.pickup_delay() * self.time_scale, self._pickup, order_id)
+        try:
+            await pickup
+        finally:
+            self._pickups.pop(order_id, None)
+            self.shelf.take(order_id)
+        with self._stats_lock:
+            self.completed += 1
+        await self._call(on_complete, order_id)
+
+    def _settled(self, order_id):
+        for listener in self.on_settled:
+            listener(order_id)
+
+    def _pickup(self, order_id):
+        pickup = self._pickups.get(order_id)
+        if pickup is not None and not pickup.done():
+            pickup.set_result(None)
+
+    def collect(self, order_id):
+        """ A customer collected a ready order, callable from any thread """
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._pickup, order_id)
+
+    def in_flight(self):
+        """ Orders still in the kitchen, i.e. not yet on the ready shelf """
+        with self._stats_lock:
+            return self.submitted - self.shelved - self.failed
+
+    def stats(self):
+        """ Throughput in orders/minute and per-stage occupancy (share of worker time spent busy).
+        seconds_per_order is the measured worker time per order at each stage, None until one has been through. """
+        with self._stats_lock:
+            elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+            stages = {}
+            for stage in KITCHEN_STAGES:
+                capacity = self.workers[stage] * elapsed
+                stages[stage] = {
+                    "workers": self.workers[stage],
+                    "busy": self._busy[stage],
+                    "queued": self._waiting[stage],
+                    "occupancy": self._busy_time[stage] / capacity if capacity else 0.0,
+                    "seconds_per_order": self._busy_time[stage] / self._handled[stage] if self._handled[stage] else None,
+                }
+            return {
+                "elapsed": elapsed,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "in_flight": self.submitted - self.shelved - self.failed,
+                "orders_per_minute": self.shelved / elapsed * 60 if elapsed else 0.0,
+                "shelf": self.shelf.stats(),
+                "batches": self.batches,
+                "average_batch": self.batched_orders / self.batches if self.batches else 0.0,
+                "stages": stages,
+            }
+
+    async def _drain(self, timeout):
+        """ Wait up to timeout for the kitchen to empty, then cancel whatever is left (including orders waiting
+        on the shelf for their customer) and wait for the cancellations to land. Returns order id -> stage
+        for every order that was interrupted. """
+        import asyncio
+        deadline = time.monotonic() + timeout
+        while self.in_flight() > 0 and time.monotonic() < deadline:
+            await asyncio.sleep(0.02)
+        interrupted = dict(self._stages)
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks, timeout=max(0.1, deadline - time.monotonic()))
+        return interrupted
+
+    def shutdown(self, timeout=1.0):
+        """ Drain the kitchen for up to timeout seconds, cancel the rest and stop the loop and handler threads.
+        Returns {"completed": collected orders, "interrupted": order id -> stage it stopped in}. Each order's
+        status in the order store already says where it stopped, so interrupted orders can be resumed. """
+        if self._loop is None or not self._thread.is_alive():
+            return {"completed": self.completed, "interrupted": {}}
+        import asyncio
+        from concurrent.futures import TimeoutError as FutureTimeout
+        started = time.monotonic()
+        future = asyncio.run_coroutine_threadsafe(self._drain(timeout), self._loop)
+        try:
+            interrupted = future.result(timeout + 0.5)
+        except FutureTimeout:
+            future.cancel()
+            interrupted = dict(self._stages)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(max(0.1, timeout - (time.monotonic() - started)))
+        # Cancelled orders no longer queue handler calls, so the handler threads finish what they are running and exit
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        return {"completed": self.completed, "interrupted": interrupted}
+
+def format_kitchen_stats(stats):
+    lines = [
+        f"Orders completed: {stats['completed']} of {stats['submitted']} ({stats['failed']} failed)",
+        f"Throughput: {stats['orders_per_minute']:.1f} orders/minute out of the kitchen",
+        f"Ready shelf: {stats['shelf']['on_shelf']} waiting, {stats['shelf']['collected']} collected, "
+        f"{stats['shelf']['average_wait']:.1f}s average wait for the customer",
+        f"Oven batches: {stats['batches']}, {stats['average_batch']:.1f} orders on average",
+    ]
+    for stage, info in stats["stages"].items():
+        lines.append(f"{stage.title()}: {info['workers']} workers, {info['occupancy']:.0%} occupied, "
+                     f"{info['busy']} busy, {info['queued']} queued")
+    return lines
+
+# Admission control 
+MAX_IN_FLIGHT = 20 # Orders in the kitchen at once, more are held back
+MAX_HELD = 30 # Orders held waiting for the kitchen, more are turned away
+MAX_WAIT = 600.0 # Seconds, orders that would wait longer than this on measured throughput are turned away
+
+class AdmissionController:
+    """ Capacity-aware front door for the kitchen pipeline. An order is accepted straight into the kitchen
+    while fewer than max_in_flight are in progress, delayed (held in a bounded backlog and released as orders
+    leave the kitchen) while fewer than max_held are waiting, and rejected after that, so coroutines and
+    memory stay bounded under a burst. Every decision comes with an ETA from the stage service times
+    measured so far (TASK_DURATIONS until a stage has handled an order), and an order that would wait more
+    than max_wait seconds behind others is rejected even while there is room, so a slow kitchen sheds load. """
+    def __init__(self, pipeline, max_in_flight=MAX_IN_FLIGHT, max_held=MAX_HELD, max_wait=MAX_WAIT):
+        self.pipeline = pipeline
+        self.max_in_flight = max_in_flight
+        self.max_held = max_held
+        self.max_wait = max_wait
+        self.rejected = 0
+        self.closed = False # Set at shutdown, no more orders go into the kitchen
+        self._held = deque() # (order_id, submit keyword arguments)
+        self._lock = threading.Lock()
+        pipeline.on_settled.append(self._release)
+
+    def held(self):
+        with self._lock:
+            return len(self._held)
+
+    def _stage_seconds(self):
+        """ Measured seconds of worker time per order at each stage, falling back to the configured durations """
+        stages = self.pipeline.stats()["stages"]
+        seconds = {}
+        for stage in KITCHEN_STAGES:
+            measured = stages[stage]["seconds_per_order"]
+            seconds[stage] = measured if measured is not None else self.pipeline.durations[STAGE_DURATION_KEYS[stage]]
+        return seconds
+
+    # Time Complexity O(1) 
+    def estimate_wait(self, ahead):
+        """ Seconds until an order with ahead orders in front of it is on the ready shelf: its own trip through
+        the kitchen plus the queue ahead draining at the bottleneck stage's rate """
+        seconds = self._stage_seconds()
+        bottleneck = max(seconds[stage] / self.pipeline.workers[stage] for stage in KITCHEN_STAGES)
+        return sum(seconds.values()) + ahead * bottleneck
+
+    def _decide_locked(self):
+        """ (decision, eta seconds) from the queue depth and the wait it means at the measured stage rates """
+        if self.closed:
+            return "reject", self.estimate_wait(0)
+        in_flight = self.pipeline.in_flight()
+        ahead = in_flight + len(self._held)
+        if in_flight < self.max_in_flight and not self._held:
+            decision = "accept"
+        elif len(self._held) < self.max_held:
+            decision = "delay"
+        else:
+            decision = "reject"
+        eta = self.estimate_wait(ahead)
+        if decision != "reject" and ahead and eta > self.max_wait:
+            decision = "reject" # There is room, but the kitchen is too slow to get through the queue in time
+        return decision, eta
+
+    def quote(self):
+        """ (decision, eta seconds) a new order would get right now, decision is accept, delay or reject.
+        A reject is counted, nothing else changes. """
+        with self._lock:
+            decision, eta = self._decide_locked()
+            if decision == "reject":
+                self.rejected += 1
+        return decision, eta
+
+    def admit(self, order_id, **submit_kwargs):
+        """ Submit the order now or hold it, as quote() would decide. Returns (decision, eta seconds);
+        on reject nothing was queued. """
+        with self._lock: # submit() only queues onto the kitchen loop, so it is fine to call under the lock
+            decision, eta = self._decide_locked()
+            if decision == "accept":
+                self.pipeline.submit(order_id, **submit_kwargs)
+            elif decision == "delay":
+                self._held.append((order_id, submit_kwargs))
+            else:
+                self.rejected += 1
+        return decision, eta
+
+    def _release(self, order_id):
+        # An order left the kitchen, let held orders in while there is room 
+        with self._lock:
+            while self._held and not self.closed and self.pipeline.in_flight() < self.max_in_flight:
+                held_id, submit_kwargs = self._held.popleft()
+                self.pipeline.submit(held_id, **submit_kwargs)
+
+    def close(self):
+        """ Stop admitting orders and return the ids still held, they stay "Waiting" in the order store """
+        with self._lock:
+            self.closed = True
+            held = [order_id for order_id, _ in self._held]
+            self._held.clear()
+        return held
+
+def format_eta(seconds):
+    if seconds < 60:
+        return "less than a minute"
+    minutes = round(seconds / 60)
+    return "1 minute" if minutes == 1 else f"{minutes} minutes"
+
+# Headless simulation 
+# Time Complexity O(n) 
+def random_orders(count=SIMULATION_ORDERS, seed=None):
+    """ Build count random orders keyed by string order id, as used by the workflow simulation. """
+    rng = random.Random(seed)
+    orders = {}
+    for i in range(count):
+        order_id = i + 1
+        orders[str(order_id)] = {
+            "pizza_type": rng.choice(PIZZA_TYPES),
+            "size": rng.choice(SIZES),
+            "quantity": rng.randint(1, 3),
+            "status": "Pending",
+            "time_registered": datetime.now().isoformat()
+        }
+    return orders
+
+# Synthetic workloads 
+WORKLOAD_FILE = "simulation_orders.ndjson"
+ARRIVAL_PROCESSES = ("uniform", "poisson", "peaks", "burst")
+DEFAULT_ARRIVAL = "poisson"
+DEFAULT_ORDER_RATE = 60.0 # Orders per hour, outside the meal peaks and bursts
+OPENING_HOUR = 11 # Generated workloads start at this time of day
+MEAL_PEAKS = ((12.5, 0.75, 4.0), (18.5, 1.0, 5.0)) # Lunch and dinner: (hour of day, spread in hours, rate multiplier)
+BURST_FACTOR = 5.0 # Arrival rate multiplier during a burst...
+BURST_SECONDS = 300.0 # ...which lasts this long on average...
+BURST_GAP_SECONDS = 3600.0 # ...with this long between bursts on average
+# Relative popularity of each menu item, size and quantity 
+PIZZA_WEIGHTS = {
+    "Chef Sagir's Special": 2.0,
+    "Meat Feast": 3.0,
+    "Vegetable": 1.5,
+    "Margherita": 4.0,
+    "Pepperoni": 4.0,
+    "Vegetable (Vegan)": 1.0,
+    "Margherita (Vegan)": 1.0,
+}
+SIZE_WEIGHTS = {"Small": 2.0, "Medium": 5.0, "Large": 3.0}
+QUANTITY_WEIGHTS = {1: 6.0, 2: 3.0, 3: 1.0}
+
+class WorkloadGenerator:
+    """ Seeded, endless stream of synthetic (order_id, order) pairs with weighted pizza, size and quantity mixes.
+    Orders are made one at a time as the stream is read, so millions can be written or replayed in constant memory,
+    and iterating again with the same seed gives the same orders. Each order carries "arrival", seconds since
+    opening, from one of ARRIVAL_PROCESSES:
+    - uniform: evenly spaced at rate,
+    - poisson: exponential gaps averaging rate,
+    - peaks: Poisson whose rate rises around lunch and dinner (MEAL_PEAKS),
+    - burst: Poisson that switches to BURST_FACTOR times the rate for short bursts. """
+    def __init__(self, seed=None, arrival=DEFAULT_ARRIVAL, rate=DEFAULT_ORDER_RATE, start=None,
+                 pizza_weights=None, size_weights=None, quantity_weights=None):
+        if arrival not in ARRIVAL_PROCESSES:
+            raise ValueError(f"Unknown arrival process {arrival!r}, expected one of {', '.join(ARRIVAL_PROCESSES)}")
+        if not rate > 0:
+            raise ValueError(f"Order rate must be positive, got {rate}")
+        self.seed = seed
+        self.arrival = arrival
+        self.rate = rate / 3600 # Orders per second
+        self.start = start or datetime.now().replace(hour=OPENING_HOUR, minute=0, second=0, microsecond=0)
+        self.mixes = []
+        for weights in (pizza_weights or PIZZA_WEIGHTS, size_weights or SIZE_WEIGHTS, quantity_weights or QUANTITY_WEIGHTS):
+            # Cumulative weights once, so each draw is a bisect rather than a pass over the weights
+            self.mixes.append((list(weights), list(itertools.accumulate(weights.values()))))
+
+    def rate_at(self, seconds):
+        """ Orders per second, seconds after opening, for the peaks process """
+        hour = (self.start.hour + self.start.minute / 60 + seconds / 3600) % 24
+        boost = sum((multiplier - 1) * math.exp(-((hour - peak) / spread) ** 2 / 2) for peak, spread, multiplier in MEAL_PEAKS)
+        return self.rate * (1 + boost)
+
+    def _arrivals(self, rng):
+        now = 0.0
+        if self.arrival == "uniform":
+            while True:
+                now += 1 / self.rate
+                yield now
+        elif self.arrival == "poisson":
+            while True:
+                now += rng.expovariate(self.rate)
+                yield now
+        elif self.arrival == "peaks":
+            # Thinning: candidates at the highest rate, each kept with probability rate_at(now) / highest
+            highest = self.rate * (1 + sum(multiplier - 1 for _, _, multiplier in MEAL_PEAKS))
+            while True:
+                now += rng.expovariate(highest)
+                if rng.random() * highest <= self.rate_at(now):
+                    yield now
+        else: # burst
+            bursting = False
+            switch_at = rng.expovariate(1 / BURST_GAP_SECONDS)
+            while True:
+                gap = rng.expovariate(self.rate * (BURST_FACTOR if bursting else 1))
+                if now + gap < switch_at:
+                    now += gap
+                    yield now
+                    continue
+                # Gaps are memoryless, so the draw can simply restart at the switch
+                now, bursting = switch_at, not bursting
+                switch_at = now + rng.expovariate(1 / (BURST_SECONDS if bursting else BURST_GAP_SECONDS))
+
+    # Time Complexity O(log k) per order for k menu items 
+    def __iter__(self):
+        rng = random.Random(self.seed)
+        (pizzas, pizza_weights), (sizes, size_weights), (quantities, quantity_weights) = self.mixes
+        for order_id, arrival in enumerate(self._arrivals(rng), 1):
+            yield str(order_id), {
+                "pizza_type": rng.choices(pizzas, cum_weights=pizza_weights)[0],
+                "size": rng.choices(sizes, cum_weights=size_weights)[0],
+                "quantity": rng.choices(quantities, cum_weights=quantity_weights)[0],
+                "status": "Pending",
+                "time_registered": (self.start + timedelta(seconds=arrival)).isoformat(timespec="seconds"),
+                "arrival": round(arrival, 3),
+            }
+
+    def orders(self, count):
+        """ The first count orders of the stream """
+        return itertools.islice(self, count)
+
+# Time Complexity O(n), one order in memory at a time 
+def write_workload(orders, path=WORKLOAD_FILE):
+    """ Stream (order_id, order) pairs to compact NDJSON, one order per line. Returns how many were written. """
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for order_id, order in orders:
+            f.write(json.dumps({"id": order_id, **order}, separators=(",", ":"), default=json_default) + "\n")
+            count += 1
+    return count
+
+def read_workload(path=WORKLOAD_FILE):
+    """ Lazily yield the (order_id, order) pairs of a write_workload file """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                order = json.loads(line)
+                yield order.pop("id"), order
+
+class VirtualClock:
+    """ Simulation time in seconds. It only moves when the scheduler pops the next event. """
+    def __init__(self):
+        self.now = 0.0
+
+    def advance_to(self, when):
+        self.now = max(self.now, when)
+
+class DiscreteEventSimulator:
+    """ Runs orders through the same register -> cook -> ready shelf stages, worker counts, TASK_DURATIONS and
+    oven batching as KitchenPipeline, but on a VirtualClock with a priority-queue scheduler: no Tk root and
+    no sleeping, so 100k orders replay in seconds. Stage queues are ordered by each order's priority, as the
+    pipeline's are, so scheduling policies can be compared offline. Latency, throughput and deadlines are
+    measured to the ready shelf; customers then collect after pickup_delay without using a worker. """
+    def __init__(self, workers=None, durations=None, batch_window=BATCH_WINDOW, batch_capacity=BATCH_CAPACITY):
+        self.workers = dict(STAGE_WORKERS, **(workers or {}))
+        self.durations = durations or TASK_DURATIONS
+        self.batch_window = batch_window
+        self.batch_capacity = batch_capacity
+        self.clock = VirtualClock()
+        self._events = [] # Heap of (time, sequence, kind, stage, payload)
+        self._sequence = 0 # Tie breaker so equal times keep insertion order
+
+    def _schedule(self, when, kind, stage, payload):
+        heapq.heappush(self._events, (when, self._sequence, kind, stage, payload))
+        self._sequence += 1
+
+    # Time Complexity O(n log m) where n is number of orders and m the most in the shop at once 
+    def run(self, orders, arrival_interval=0.0, batch_key=None, priority=None, deadline=None, pickup_delay=None,
+            arrival=None):
+        """ orders is an iterable of order ids, arriving arrival_interval virtual seconds apart, or at
+        arrival(order_id, index) seconds if given (which must not decrease).
+        batch_key(order_id) gives the key orders are batched on at the cook stage, None turns batching off.
+        priority(order_id, arrival) orders the stage queues (default FIFO) and deadline(order_id, arrival) is
+        the promised collection time on the virtual clock, counted as a miss if the order is ready later.
+        pickup_delay(order_id) is how long its customer takes to turn up, collect_order seconds by default.
+        orders is only read as each one arrives and every callback is called then, so it can be a stream;
+        only the orders still in the shop are held.
+        Returns a results dict with throughput and latency percentiles, taken from LatencyHistograms so memory
+        does not grow with the number of orders (each percentile is within 1/HISTOGRAM_SUB_BUCKETS). """
+        batching = batch_key is not None and self.batch_capacity > 1
+        free = dict(self.workers)
+        waiting = {stage: [] for stage in KITCHEN_STAGES} # Heaps of (priority, sequence, order ids) waiting for a worker
+        priorities = {}
+        deadlines = {}
+        keys = {} # Batch keys
+        pickups = {} # Customer pickup delays
+        lateness = LatencyHistogram() # ms late, for orders that missed their deadline
+        open_batches = {} # batch key -> order ids of the batch still open for matching orders
+        queued = set() # id() of batches already waiting for or in an oven
+        waiting_batches = {} # id() of a batch waiting for an oven -> its current heap entry
+        busy_time = {stage: 0.0 for stage in KITCHEN_STAGES}
+        entered = {} # (order_id, stage) -> time the order joined the stage queue
+        arrived = {}
+        stage_waits = {stage: LatencyHistogram() for stage in KITCHEN_STAGES} # Histograms keep memory O(1) in orders
+        on_shelf = 0
+        peak_on_shelf = 0
+        last_ready = 0.0
+        latencies = LatencyHistogram() # ms from arrival to ready
+        batches = 0
+        batched_orders = 0
+
+        source = enumerate(orders)
+
+        def pull():
+            # Schedule the next order's arrival, the next one is pulled when this one arrives
+            for i, order_id in source:
+                when = i * arrival_interval if arrival is None else arrival(order_id, i)
+                arrived[order_id] = when
+                priorities[order_id] = (i,) if priority is None else priority(order_id, when)
+                if deadline is not None:
+                    deadlines[order_id] = deadline(order_id, when)
+                if batching:
+                    keys[order_id] = batch_key(order_id)
+                pickups[order_id] = self.durations["collect_order"] if pickup_delay is None else pickup_delay(order_id)
+                # Sequence -1: as when every arrival was scheduled up front, it goes before other events at the same time
+                heapq.heappush(self._events, (when, -1, "arrive", KITCHEN_STAGES[0], order_id))
+                return
+
+        def start(stage, members):
+            nonlocal batches, batched_orders
+            free[stage] -= 1
+            if stage == BATCH_STAGE and batching:
+                seal(members)
+                batches += 1
+                batched_orders += len(members)
+            for order_id in members:
+                stage_waits[stage].record((self.clock.now - entered.pop((order_id, stage))) * 1000)
+            duration = self.durations[STAGE_DURATION_KEYS[stage]]
+            busy_time[stage] += duration
+            self._schedule(self.clock.now + duration, "finish", stage, members)
+
+        def ready(stage, members):
+            if free[stage]:
+                start(stage, members)
+            else:
+                # A batch goes as early as its most urgent order
+                entry = (min(priorities[order_id] for order_id in members), self._sequence, members)
+                heapq.heappush(waiting[stage], entry)
+                self._sequence += 1
+                if stage == BATCH_STAGE and batching:
+                    waiting_batches[id(members)] = entry
+
+        def next_waiting(stage):
+            # Pop the most urgent waiter, skipping batch entries superseded when a more urgent order joined
+            while waiting[stage]:
+                entry = heapq.heappop(waiting[stage])
+                if stage != BATCH_STAGE or not batching:
+                    return entry[2]
+                if waiting_batches.get(id(entry[2])) is entry:
+                    del waiting_batches[id(entry[2])]
+                    return entry[2]
+            return None
+
+        def seal(batch):
+            # No more orders can join, it is full or has an oven
+            key = keys[batch[0]]
+            if open_batches.get(key) is batch:
+                del open_batches[key]
+
+        def queue_batch(batch):
+            # Window ran out or the batch filled up; it still takes matching orders until an oven is free
+            if id(batch) not in queued:
+                queued.add(id(batch))
+                ready(BATCH_STAGE, batch)
+
+        wall_start = time.perf_counter()
+        pull()
+        while self._events:
+            when, _, kind, stage, payload = heapq.heappop(self._events)
+            self.clock.advance_to(when)
+            if kind == "arrive":
+                order_id = payload
+                if stage == KITCHEN_STAGES[0]:
+                    pull()
+                entered[(order_id, stage)] = self.clock.now
+                if stage == BATCH_STAGE and batching:
+                    key = keys[order_id]
+                    batch = open_batches.get(key)
+                    if batch is None:
+                        batch = open_batches[key] = []
+                        self._schedule(self.clock.now + self.batch_window, "window", stage, batch)
+                    batch.append(order_id)
+                    entry = waiting_batches.get(id(batch))
+                    if entry is not None and priorities[order_id] < entry[0]: # Move the waiting batch up
+                        entry = (priorities[order_id], entry[1], batch)
+                        heapq.heappush(waiting[stage], entry)
+                        waiting_batches[id(batch)] = entry
+                    if len(batch) >= self.batch_capacity:
+                        seal(batch)
+                        queue_batch(batch)
+                else:
+                    ready(stage, [order_id])
+            elif kind == "window":
+                queue_batch(payload)
+            elif kind == "collected":
+                on_shelf -= 1
+            else: # finish
+                free[stage] += 1
+                if stage == BATCH_STAGE and batching:
+                    queued.discard(id(payload))
+                members = next_waiting(stage)
+                if members is not None:
+                    start(stage, members)
+                index = KITCHEN_STAGES.index(stage) + 1
+                for order_id in payload:
+                    if index < len(KITCHEN_STAGES):
+                        self._schedule(self.clock.now, "arrive", KITCHEN_STAGES[index], order_id)
+                        continue
+                    # Ready: onto the shelf, the worker is already free for the next order
+                    latencies.record((self.clock.now - arrived.pop(order_id)) * 1000)
+                    priorities.pop(order_id)
+                    keys.pop(order_id, None)
+                    last_ready = self.clock.now
+                    promised = deadlines.pop(order_id, None)
+                    if promised is not None and self.clock.now > promised:
+                        lateness.record((self.clock.now - promised) * 1000)
+                    on_shelf += 1
+                    peak_on_shelf = max(peak_on_shelf, on_shelf)
+                    self._schedule(self.clock.now + pickups.pop(order_id), "collected", COLLECT_STAGE, order_id)
+
+        makespan = last_ready
+        results = {
+            "orders": latencies.total,
+            "virtual_seconds": makespan,
+            "peak_on_shelf": peak_on_shelf,
+            "wall_seconds": time.perf_counter() - wall_start,
+            "orders_per_minute": latencies.total / makespan * 60 if makespan else 0.0,
+            "latency": {f"p{p}": latencies.percentile(p) / 1000 for p in (50, 90, 99)},
+            "batches": batches,
+            "average_batch": batched_orders / batches if batches else 0.0,
+            "stages": {},
+        }
+        results["latency"]["max"] = latencies.max / 1000
+        if deadline is not None:
+            results["deadlines"] = {
+                "misses": lateness.total,
+                "miss_rate": lateness.total / latencies.total if latencies.total else 0.0,
+                "lateness_p50": lateness.percentile(50) / 1000,
+                "lateness_max": lateness.max / 1000,
+            }
+        for stage in KITCHEN_STAGES:
+            waits = stage_waits[stage]
+            capacity = self.workers[stage] * makespan
+            results["stages"][stage] = {
+                "workers": self.workers[stage],
+                "occupancy": busy_time[stage] / capacity if capacity else 0.0,
+                "wait_p50": waits.percentile(50) / 1000,
+                "wait_p99": waits.percentile(99) / 1000,
+            }
+        return results
+
+def format_simulation_results(results):
+    latency = results["latency"]
+    lines = [
+        f"Simulated {results['orders']} orders ready in {results['virtual_seconds']:.0f} virtual seconds "
+        f"({results['wall_seconds']:.2f}s wall time)",
+        f"Throughput: {results['orders_per_minute']:.1f} orders/minute",
+        f"Latency to ready p50 {latency['p50']:.1f}s, p90 {latency['p90']:.1f}s, p99 {latency['p99']:.1f}s, max {latency['max']:.1f}s",
+        f"Ready shelf: at most {results['peak_on_shelf']} orders waiting for their customer",
+    ]
+    if results["batches"]:
+        lines.append(f"Oven batches: {results['batches']}, {results['average_batch']:.1f} orders on average")
+    if "deadlines" in results:
+        deadlines = results["deadlines"]
+        lines.append(f"Deadline misses: {deadlines['misses']} ({deadlines['miss_rate']:.0%}), "
+                     f"median lateness {deadlines['lateness_p50']:.1f}s, worst {deadlines['lateness_max']:.1f}s")
+    for stage, info in results["stages"].items():
+        lines.append(f"{stage.title()}: {info['workers']} workers, {info['occupancy']:.0%} occupied, "
+                     f"wait p50 {info['wait_p50']:.1f}s, p99 {info['wait_p99']:.1f}s")
+    return lines
+
+# Time Complexity O(n log m) for n orders, m of them in the shop at once 
+def simulate_workload(orders, policy=DEFAULT_POLICY, arrival_interval=0.0, workers=None, batch_window=BATCH_WINDOW,
+                      batch_capacity=BATCH_CAPACITY):
+    """ Run (order_id, order) pairs through the DiscreteEventSimulator under a scheduling policy, batching on
+    pizza type and size and with deadlines from promised_time. Orders arrive arrival_interval apart, or at their
+    own "arrival" seconds (as written by WorkloadGenerator) when arrival_interval is None.
+    orders is consumed lazily, so a read_workload stream of any length replays in bounded memory. """
+    scheduler = OrderScheduler(policy)
+    simulator = DiscreteEventSimulator(workers=workers, batch_window=batch_window, batch_capacity=batch_capacity)
+    current = {} # The order just pulled, the simulator calls back for it before pulling the next
+    def order_ids():
+        for order_id, order in orders:
+            current.clear()
+            current[order_id] = order
+            yield order_id
+    return simulator.run(
+        order_ids(), arrival_interval=arrival_interval or 0.0,
+        arrival=(lambda order_id, i: current[order_id].get("arrival", 0.0)) if arrival_interval is None else None,
+        batch_key=lambda order_id: (current[order_id]["pizza_type"], current[order_id]["size"]),
+        priority=lambda order_id, arrival: scheduler.priority(current[order_id], registered=arrival),
+        deadline=lambda order_id, arrival: promised_time(current[order_id], registered=arrival),
+    )
+
+# Time Complexity O(p n log n) for p policies 
+def compare_policies(orders, arrival_interval=0.0, workers=None, batch_window=BATCH_WINDOW, batch_capacity=BATCH_CAPACITY,
+                     policies=SCHEDULING_POLICIES):
+    """ Replay the same workload under each scheduling policy and return policy -> simulation results, including
+    deadline misses against promised_time. orders is order id -> order (e.g. from generate_random_orders), or a
+    function returning a fresh stream of (order_id, order) pairs for each policy, e.g. lambda: read_workload(path). """
+    open_orders = orders.items if isinstance(orders, dict) else orders
+    return {policy: simulate_workload(open_orders(), policy, arrival_interval, workers, batch_window, batch_capacity)
+            for policy in policies}
+
+def format_policy_report(reports):
+    lines = [f"Deadline misses per scheduling policy ({PROMISE_BASE_SECONDS}s + {PROMISE_PER_PIZZA_SECONDS}s per pizza promised)"]
+    for policy, results in reports.items():
+        deadlines = results["deadlines"]
+        lines.append(f"{policy.upper()}: {deadlines['misses']} of {results['orders']} late ({deadlines['miss_rate']:.0%}), "
+                     f"median lateness {deadlines['lateness_p50']:.1f}s, worst {deadlines['lateness_max']:.1f}s, "
+                     f"latency p50 {results['latency']['p50']:.1f}s")
+    return lines
+
+# Tk bridge 
+TK_POLL_INTERVAL = 50 # Milliseconds between drains of the bridge queue
+
+class TkBridge:
+    """ Thread-safe way for the kitchen loop and worker threads to run code on the Tk mainloop.
+    Tk itself must only be touched from its own thread, so calls are queued and drained by a root.after poll. """
+    def __init__(self, root, interval=TK_POLL_INTERVAL):
+        self.root = root
+        self.interval = interval
+        self._calls = Queue()
+        self._polling = False
+
+    def start(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.interval, self._drain)
+
+    # Time Complexity O(1), safe from any thread 
+    def call(self, func, *args, delay=0):
+        """ Run func(*args) on the Tk thread, optionally delay milliseconds later. """
+        self._calls.put((func, args, delay))
+
+    def _drain(self):
+        while True:
+            try:
+                func, args, delay = self._calls.get_nowait()
+            except Empty:
+                break
+            try:
+                if delay:
+                    self.root.after(delay, func, *args)
+                else:
+                    func(*args)
+            except Exception as e:
+                print(f"Error in UI callback: {e}")
+        self.root.after(self.interval, self._drain)
+
+# UI update bus 
+UI_FRAME_INTERVAL = 33 # Milliseconds per frame, roughly 30 batched Order Track refreshes a second
+
+class UIUpdateBus:
+    """ Coalesces Order Track status changes from worker threads.
+    push() appends to a deque (appends and pops are atomic in CPython, so producers never take a lock) and the Tk side
+    drains it once per frame, keeping only the latest status per order and applying the whole batch in one go.
+    A status of None removes the row. """
+    def __init__(self, root, apply_batch, interval=UI_FRAME_INTERVAL):
+        self.root = root
+        self.apply_batch = apply_batch
+        self.interval = interval
+        self._pending = deque()
+        self._running = False
+
+    def start(self):
+        if not self._running:
+            self._running = True
+            self.root.after(self.interval, self._frame)
+
+    # Time Complexity O(1), safe from any thread 
+    def push(self, order_id, status):
+        self._pending.append((order_id, status))
+
+    def remove(self, order_id):
+        self._pending.append((order_id, None))
+
+    # Time Complexity O(k) for k queued updates, applying at most one per order 
+    def drain(self):
+        latest = {}
+        for _ in range(len(self._pending)):
+            order_id, status = self._pending.popleft()
+            latest[str(order_id)] = status
+        if latest:
+            try:
+                self.apply_batch(latest)
+            except Exception as e:
+                print(f"Error updating tree: {e}")
+        return len(latest)
+
+    def _frame(self):
+        self.drain()
+        self.root.after(self.interval, self._frame)
+
+# Order browser index 
+ORDERS_PAGE_SIZE = 100 # Rows materialised at a time in the Show All Orders window
+ORDER_SORT_KEYS = {"Order ID": "id", "Status": "status", "Pizza Type": "pizza_type"}
+
+def order_sort_key(order_id):
+    # Session orders reload with string keys, new ones are ints, so sort numerically where possible
+    try:
+        return (0, int(order_id), "")
+    except (TypeError, ValueError):
+        return (1, 0, str(order_id))
+
+class OrderIndex:
+    """ In-memory index over the session's orders for the Show All Orders browser.
+    Keeps orders in id order, bucketed by status and by pizza type, plus a word index for search,
+    so a page of results costs O(buckets + page size) however many orders the session holds. """
+    def __init__(self, orders=None):
+        self.orders = {}
+        self.ids = [] # Ascending order ids
+        self.buckets = {"status": {}, "pizza_type": {}} # field -> value -> {order_id: None} (ordered set)
+        self.words = {} # lower-case word -> set of order ids
+        for order_id in sorted(orders or {}, key=order_sort_key):
+            self.add(order_id, orders[order_id])
+
+    @staticmethod
+    def _words(order):
+        text = f"{order.get('pizza_type', '')} {order.get('size', '')} {order.get('status', '')}"
+        return set(text.lower().replace("(", " ").replace(")", " ").split())
+
+    # Time Complexity O(w) for w words in the order, ids are appended in ascending order 
+    def add(self, order_id, order):
+        if order_id in self.orders:
+            return
+        if self.ids and order_sort_key(order_id) < order_sort_key(self.ids[-1]):
+            self.ids.insert(bisect.bisect(self.ids, order_sort_key(order_id), key=order_sort_key), order_id)
+        else:
+            self.ids.append(order_id)
+        self.orders[order_id] = order
+        for field, buckets in self.buckets.items():
+            buckets.setdefault(order.get(field, ""), {})[order_id] = None
+        for word in self._words(order):
+            self.words.setdefault(word, set()).add(order_id)
+
+    # Time Complexity O(1) 
+    def update_status(self, order_id, old_status, new_status):
+        if order_id not in self.orders or old_status == new_status:
+            return
+        # Within a status, orders are kept in the order they reached it
+        self.buckets["status"].get(old_status, {}).pop(order_id, None)
+        self.buckets["status"].setdefault(new_status, {})[order_id] = None
+        for word in str(old_status).lower().split():
+            self.words.get(word, set()).discard(order_id)
+        for word in str(new_status).lower().split():
+            self.words.setdefault(word, set()).add(order_id)
+
+    def _search(self, text):
+        """ Every search word must match (as a prefix) a word of the order, or the order id itself. """
+        matches = None
+        for term in text.lower().split():
+            hits = set()
+            if term in self.orders or term.isdigit() and int(term) in self.orders:
+                hits.add(term if term in self.orders else int(term))
+            for word, ids in self.words.items(): # Vocabulary is menu, sizes and statuses, so it stays small
+                if word.startswith(term):
+                    hits |= ids
+            matches = hits if matches is None else matches & hits
+        return matches or set()
+
+    # Time Complexity O(buckets + limit) without search, O(m log m) for m search matches 
+    def query(self, search="", sort_by="id", descending=False, offset=0, limit=ORDERS_PAGE_SIZE):
+        """ Returns (total matching orders, one page of order ids). """
+        if search.strip():
+            matches = self._search(search)
+            if sort_by == "id":
+                key = order_sort_key
+            else:
+                key = lambda order_id: (str(self.orders[order_id].get(sort_by, "")), order_sort_key(order_id))
+            ordered = sorted(matches, key=key, reverse=descending)
+            return len(ordered), ordered[offset:offset + limit]
+
+        total = len(self.ids)
+        if offset >= total:
+            return total, [] # Past the last page, the descending slice below would wrap round
+        if sort_by == "id":
+            if descending:
+                start = max(0, total - offset - limit)
+                return total, self.ids[start:total - offset][::-1]
+            return total, self.ids[offset:offset + limit]
+
+        # Walk the buckets in key order, skipping whole buckets until the page starts
+        page = []
+        for value in sorted(self.buckets[sort_by], key=str, reverse=descending):
+            bucket = self.buckets[sort_by][value]
+            if offset >= len(bucket):
+                offset -= len(bucket)
+                continue
+            ids = list(itertools.islice(reversed(bucket) if descending else iter(bucket), offset, offset + limit - len(page)))
+            page.extend(ids)
+            offset = 0
+            if len(page) >= limit:
+                break
+        return total, page
+
+# Order analytics 
+PIZZA_PRICES = {"Small": 8.00, "Medium": 10.50, "Large": 13.00} # Per pizza, revenue is booked when an order is collected
+FAVOURITES_SHOWN = 3 # Pizzas listed in the live Favourites panel
+
+class RankedCounter:
+    """ Counts kept in a list ranked by count, so the top k is a slice rather than a sort.
+    Counts only ever go up by one, so an increment just swaps the key with the first key on its old count. """
+    def __init__(self, counts=None):
+        self._counts = {}
+        self._ranking = [] # Keys, highest count first
+        self._position = {} # key -> index in _ranking
+        self._first = {} # count -> index of the first key in _ranking with that count
+        for key, count in sorted((counts or {}).items(), key=lambda item: -item[1]):
+            self._place(key, count)
+
+    def _place(self, key, count):
+        self._position[key] = len(self._ranking)
+        self._ranking.append(key)
+        self._counts[key] = count
+        self._first.setdefault(count, self._position[key])
+
+    # Time Complexity O(1) 
+    def increment(self, key):
+        if key not in self._counts:
+            self._place(key, 0)
+        count = self._counts[key]
+        i, j = self._position[key], self._first[count]
+        other = self._ranking[j]
+        self._ranking[i], self._ranking[j] = other, key
+        self._position[other], self._position[key] = i, j
+        if j + 1 < len(self._ranking) and self._counts[self._ranking[j + 1]] == count:
+            self._first[count] = j + 1
+        else:
+            del self._first[count]
+        self._counts[key] = count + 1
+        self._first.setdefault(count + 1, j)
+
+    # Time Complexity O(k) 
+    def top(self, k=None):
+        """ [(key, count), ...] for the k highest counts, all of them if k is None """
+        return [(key, self._counts[key]) for key in self._ranking[:k]]
+
+    def get(self, key, default=0):
+        return self._counts.get(key, default)
+
+    def as_dict(self):
+        return dict(self._counts)
+
+class OrderAnalytics:
+    """ Running totals behind the favourites report and panel: orders per pizza type, size and hour of the day,
+    and revenue once orders are collected. Updated as orders come in rather than recounted from the whole
+    order history, so reports cost the same however many orders the shop has taken.
+    on_change(snapshot) is called after every update, the session store uses it to persist the totals. """
+    def __init__(self, data=None, on_change=None):
+        data = data or {}
+        self._lock = threading.Lock()
+        self.on_change = on_change
+        self.orders = data.get("orders", 0)
+        self.collected = data.get("collected", 0)
+        self.pizzas = RankedCounter(data.get("pizzas")) # Lower-case pizza type -> orders, as the report always grouped them
+        self.sizes = RankedCounter(data.get("sizes"))
+        self.hours = {int(hour): count for hour, count in data.get("hours", {}).items()} # JSON keys are strings
+        self.revenue = data.get("revenue", 0.0)
+        self.revenue_by_pizza = dict(data.get("revenue_by_pizza", {}))
+
+    # Time Complexity O(n), only used when there are no saved totals to start from 
+    @classmethod
+    def rebuild(cls, orders, on_change=None):
+        """ Totals for [(order_id, order), ...] from scratch """
+        analytics = cls()
+        for _, order in orders:
+            analytics.record_order(order)
+            if order.get("status") == "Collected":
+                analytics.record_collected(order)
+        analytics.on_change = on_change
+        return analytics
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change(self.snapshot)
+
+    # Time Complexity O(1) 
+    def record_order(self, order):
+        hour = datetime.fromtimestamp(registered_timestamp(order)).hour
+        with self._lock:
+            self.orders += 1
+            self.pizzas.increment(str(order["pizza_type"]).lower())
+            self.sizes.increment(order["size"])
+            self.hours[hour] = self.hours.get(hour, 0) + 1
+        self._changed()
+
+    # Time Complexity O(1) 
+    def record_collected(self, order):
+        amount = PIZZA_PRICES.get(order["size"], 0.0) * int(order["quantity"])
+        pizza_name = str(order["pizza_type"]).lower()
+        with self._lock:
+            self.collected += 1
+            self.revenue += amount
+            self.revenue_by_pizza[pizza_name] = self.revenue_by_pizza.get(pizza_name, 0.0) + amount
+        self._changed()
+
+    # Time Complexity O(k) 
+    def top_pizzas(self, k=None):
+        with self._lock:
+            return self.pizzas.top(k)
+
+    def snapshot(self):
+        """ JSON-ready copy, its size depends on the menu and not on the number of orders """
+        with self._lock:
+            return {
+                "orders": self.orders,
+                "collected": self.collected,
+                "pizzas": self.pizzas.as_dict(),
+                "sizes": self.sizes.as_dict(),
+                "hours": dict(self.hours),
+                "revenue": self.revenue,
+                "revenue_by_pizza": dict(self.revenue_by_pizza),
+            }
+
+def format_favourites_report(analytics):
+    """ Lines for favourites_report_1_2.pdf, built from the running totals """
+    snapshot = analytics.snapshot()
+    lines = [f"{pizza}: Ordered {count} times" for pizza, count in analytics.top_pizzas()]
+    lines.append("")
+    lines.append("Sizes: " + ", ".join(f"{size} {count}" for size, count in RankedCounter(snapshot["sizes"]).top()))
+    lines.append("Orders by hour: " + ", ".join(f"{hour:02d}:00 {count}" for hour, count in sorted(snapshot["hours"].items())))
+    lines.append(f"Revenue from {snapshot['collected']} collected orders: £{snapshot['revenue']:.2f}")
+    for pizza, amount in sorted(snapshot["revenue_by_pizza"].items(), key=lambda item: item[1], reverse=True):
+        lines.append(f"  {pizza}: £{amount:.2f}")
+    return lines
+
+# Order metrics 
+METRICS_WINDOW = 60.0 # Seconds of recent history the live metrics cover
+METRICS_SLICES = 6 # The window moves on a slice at a time
+HISTOGRAM_SUB_BUCKETS = 16 # Buckets per power of two, so a percentile is within 1/16 (about 6%) of the true value
+METRICS_FILE = "metrics_1_2.json"
+METRICS_REFRESH_MS = 1000 # Live Metrics window refresh interval
+FINAL_STATUSES = ("Collected", "Error", "Rejected")
+
+class LatencyHistogram:
+    """ HDR-style histogram of millisecond latencies: buckets are linear within each power of two,
+    so memory is bounded by the range of values seen rather than how many there were. """
+    SUB_BITS = HISTOGRAM_SUB_BUCKETS.bit_length() - 1
+
+    def __init__(self):
+        self.counts = {} # Bucket lower bound in ms -> values recorded
+        self.total = 0
+        self.max = 0.0
+
+    @classmethod
+    def bucket(cls, ms):
+        value = int(ms)
+        shift = max(0, value.bit_length() - cls.SUB_BITS - 1) # Values under 2 * HISTOGRAM_SUB_BUCKETS ms are exact
+        return (value >> shift) << shift
+
+    # Time Complexity O(1) 
+    def record(self, ms):
+        bucket = self.bucket(ms)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.total += 1
+        self.max = max(self.max, ms)
+
+    def merge(self, other):
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    # Time Complexity O(b log b) for b buckets, at most HISTOGRAM_SUB_BUCKETS per power of two 
+    def percentile(self, p):
+        """ Midpoint of the bucket holding the p-th percentile, in ms """
+        if not self.total:
+            return 0.0
+        rank = p / 100 * self.total
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                width = 1 << max(0, bucket.bit_length() - self.SUB_BITS - 1)
+                return min(bucket + width / 2, self.max)
+        return self.max
+
+    def summary(self):
+        return {"count": self.total, "p50_ms": self.percentile(50), "p90_ms": self.percentile(90),
+                "p99_ms": self.percentile(99), "max_ms": self.max}
+
+class RollingHistogram:
+    """ LatencyHistograms for the last window seconds, kept as slices so old values drop out a slice at a time """
+    def __init__(self, window=METRICS_WINDOW, slices=METRICS_SLICES):
+        self.window = window
+        self.slice_seconds = window / slices
+        self.slices = deque(maxlen=slices) # (slice start, LatencyHistogram), oldest first
+
+    def record(self, ms, now):
+        start = now - now % self.slice_seconds
+        if not self.slices or self.slices[-1][0] != start:
+            self.slices.append((start, LatencyHistogram()))
+        self.slices[-1][1].record(ms)
+
+    def merged(self, now):
+        histogram = LatencyHistogram()
+        for start, part in self.slices:
+            if start > now - self.window:
+                histogram.merge(part)
+        return histogram
+
+class OrderMetrics:
+    """ Stamps every order status transition and keeps rolling histograms of the time orders spend in each
+    status and of end-to-end time, from registering to collection. Safe from any thread. """
+    def __init__(self, window=METRICS_WINDOW, slices=METRICS_SLICES, clock=time.time):
+        self.window = window
+        self.slices = slices
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._current = {} # order_id -> (status, entered at, registered at)
+        self.stages = {} # status -> RollingHistogram of time spent in it
+        self.end_to_end = RollingHistogram(window, slices)
+        self.finished = {status: RollingHistogram(window, slices) for status in FINAL_STATUSES} # For throughput
+        self.started = clock()
+
+    # Time Complexity O(1) 
+    def transition(self, order_id, status, registered=None):
+        """ registered is the order's time_registered as a timestamp, so end-to-end time survives a restart """
+        now = self.clock()
+        with self._lock:
+            current = self._current.get(order_id)
+            if current is not None and current[0] == status:
+                return # Same status again (e.g. Registered on placing and after registering), keep the first stamp
+            if current is not None:
+                previous, entered, registered = current[0], current[1], current[2] if registered is None else registered
+                if previous not in self.stages:
+                    self.stages[previous] = RollingHistogram(self.window, self.slices)
+                self.stages[previous].record((now - entered) * 1000, now)
+            elif registered is None:
+                registered = now
+            if status in FINAL_STATUSES:
+                self._current.pop(order_id, None)
+                self.finished[status].record(0, now)
+                if status == "Collected":
+                    self.end_to_end.record((now - registered) * 1000, now)
+            else:
+                self._current[order_id] = (status, now, registered)
+
+    def snapshot(self):
+        """ JSON-ready summary of the current window """
+        now = self.clock()
+        covered = min(self.window, now - self.started) or 1.0
+        with self._lock:
+            collected = self.finished["Collected"].merged(now).total
+            return {
+                "window_seconds": self.window,
+                "in_progress": len(self._current),
+                "throughput_per_minute": collected / covered * 60,
+                "finished": {status: rolling.merged(now).total for status, rolling in self.finished.items()},
+                "stages": {status: rolling.merged(now).summary() for status, rolling in self.stages.items()},
+                "end_to_end": self.end_to_end.merged(now).summary(),
+            }
+
+    def export(self, filename=METRICS_FILE):
+        with open(filename, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        return filename
+
+def format_metrics(snapshot):
+    """ Lines for the Live Metrics window """
+    lines = [f"Last {snapshot['window_seconds']:.0f}s: {snapshot['throughput_per_minute']:.1f} orders/min collected, "
+             f"{snapshot['finished']['Error']} errors, {snapshot['in_progress']} in progress", "",
+             f"{'Time in':<18}{'count':>7}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}"]
+    rows = [(status, summary) for status, summary in snapshot["stages"].items()] + [("End to end", snapshot["end_to_end"])]
+    for name, summary in rows:
+        lines.append(f"{name:<18}{summary['count']:>7}" + "".join(
+            f"{summary[key] / 1000:>9.2f}s" for key in ("p50_ms", "p90_ms", "p99_ms", "max_ms")))
+    return lines
+
+# Order repositories 
+# Both expose the same interface, so PizzaShopApp.orders can be either one 
+SQLITE_FILE = "orders_1_2.sqlite3"
+
+class JsonOrderRepository:
+    """ Default order store: orders live in a dict, indexed by OrderIndex and persisted by SessionStore.
+    Reads return copies, every write goes through add/set_status so the index and deltas stay in step. """
+    def __init__(self, session_store=None):
+        self.lock = TracedLock("order_lock")
+        self.session_store = session_store or SessionStore()
+        self.session_store.snapshot_source = self.snapshot
+        session_data = self.session_store.load()
+        self._orders = session_data["orders"]
+        self.next_order_id = session_data["next_order_id"]
+        self.partial_selection = session_data.get("partial_selection", {})
+        self.load_error = session_data.get("load_error") # Reported by the caller on the Tk thread
+        self.index = OrderIndex(self._orders)
+
+    def __contains__(self, order_id):
+        return order_id in self._orders
+
+    def __len__(self):
+        return len(self._orders)
+
+    def __getitem__(self, order_id):
+        with self.lock:
+            return dict(self._orders[order_id])
+
+    def get(self, order_id, default=None):
+        with self.lock:
+            order = self._orders.get(order_id)
+            return dict(order) if order is not None else default
+
+    # Time Complexity O(1) amortised 
+    def add(self, order):
+        """ Store a new order and return its id """
+        with self.lock:
+            order_id = self.next_order_id
+            self._orders[order_id] = order
+            self.index.add(order_id, order)
+            self.next_order_id += 1 # Increment the next order by one so all submissions are unique and in order 
+            next_order_id = self.next_order_id
+        # Recorded outside the lock, compaction takes the lock itself to snapshot the orders
+        self.session_store.record_order(order_id, order, next_order_id)
+        return order_id
+
+    # Time Complexity O(1) amortised 
+    def set_status(self, order_id, status, time_collected=None):
+        with self.lock:
+            if order_id not in self._orders:
+                return False
+            self.index.update_status(order_id, self._orders[order_id].get("status"), status)
+            self._orders[order_id]["status"] = status
+            if time_collected is not None:
+                self._orders[order_id]["time_collected"] = time_collected
+        self.session_store.record_status(order_id, status, time_collected)
+        return True
+
+    def query(self, search="", sort_by="id", descending=False, offset=0, limit=ORDERS_PAGE_SIZE):
+        """ Returns (total matching orders, [(order_id, order), ...] for one page) """
+        with self.lock:
+            total, page_ids = self.index.query(search, sort_by, descending, offset, limit)
+            return total, [(order_id, dict(self._orders[order_id])) for order_id in page_ids]
+
+    # Time Complexity O(k) for k matching orders, straight from the status buckets 
+    def with_status(self, statuses):
+        """ [(order_id, order), ...] for every order in one of statuses, in id order """
+        with self.lock:
+            ids = [order_id for status in statuses for order_id in self.index.buckets["status"].get(status, ())]
+            return [(order_id, dict(self._orders[order_id])) for order_id in sorted(ids, key=order_sort_key)]
+
+    # Time Complexity O(n) 
+    def items(self):
+        """ [(order_id, order), ...] for every order, in id order """
+        with self.lock:
+            return [(order_id, dict(self._orders[order_id])) for order_id in self.index.ids]
+
+    # Time Complexity O(n) 
+    def count_by(self, field):
+        with self.lock:
+            counts = {}
+            for order in self._orders.values():
+                counts[order.get(field)] = counts.get(order.get(field), 0) + 1
+            return counts
+
+    def save_partial_selection(self, partial_selection):
+        self.session_store.save_partial_selection(partial_selection)
+
+    def snapshot(self):
+        """ Consistent (orders, next_order_id) copy for SessionStore compaction """
+        with self.lock:
+            return {order_id: dict(order) for order_id, order in self._orders.items()}, self.next_order_id
+
+    def close(self):
+        self.session_store.close()
+
+class SQLiteOrderRepository:
+    """ Optional order store in an embedded SQLite database in WAL mode.
+    Nothing is read at startup, lookups go by primary key and reports and the order browser run as indexed SQL,
+    so opening the app no longer depends on the size of the order history.
+    The first time it is opened it imports any existing JSON session. """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS orders (
+            order_id INTEGER PRIMARY KEY,
+            pizza_type TEXT NOT NULL,
+            size TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            time_registered TEXT,
+            time_collected TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_orders_status ON orders(status);
+        CREATE INDEX IF NOT EXISTS idx_orders_pizza_type ON orders(pizza_type);
+        CREATE INDEX IF NOT EXISTS idx_orders_time_registered ON orders(time_registered);
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+    """
+    COLUMNS = ("pizza_type", "size", "quantity", "status", "time_registered", "time_collected")
+    SORT_COLUMNS = {"id": "order_id", "status": "status", "pizza_type": "pizza_type"}
+
+    def __init__(self, path=SQLITE_FILE, session_store=None):
+        import sqlite3 # Only needed when the SQLite store is chosen
+        self.lock = TracedLock("order_lock")
+        new_database = not os.path.exists(path)
+        # One shared connection guarded by self.lock, autocommit with explicit transactions for batches
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(self.SCHEMA)
+        self.session_store = session_store or SessionStore() # Still used for the debounced partial selection
+        self.load_error = None # Reported by the caller on the Tk thread
+        if new_database:
+            self._import_json_session()
+        self.partial_selection = self.session_store.load_partial_selection() or {}
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'next_order_id'").fetchone()
+        self.next_order_id = int(row[0]) if row else 1
+
+    def _import_json_session(self):
+        # One-off O(n) import of session_data_1_2.json plus its deltas
+        session_data = self.session_store.load()
+        self.load_error = session_data.get("load_error")
+        rows = [(order_id,) + tuple(self._value(order, column) for column in self.COLUMNS)
+                for order_id, order in session_data["orders"].items() if isinstance(order_id, int)]
+        with self.lock:
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT OR REPLACE INTO orders VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('next_order_id', ?)", (str(session_data["next_order_id"]),))
+            self._db.execute("COMMIT")
+
+    @staticmethod
+    def _value(order, column):
+        value = order.get(column)
+        return value.isoformat() if isinstance(value, datetime) else value
+
+    def _row_to_order(self, row):
+        return dict(zip(self.COLUMNS, row))
+
+    def __contains__(self, order_id):
+        with self.lock:
+            return self._db.execute("SELECT 1 FROM orders WHERE order_id = ?", (order_id,)).fetchone() is not None
+
+    def __len__(self):
+        with self.lock:
+            return self._db.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+
+    def __getitem__(self, order_id):
+        order = self.get(order_id)
+        if order is None:
+            raise KeyError(order_id)
+        return order
+
+    # Time Complexity O(log n) primary key lookup 
+    def get(self, order_id, default=None):
+        with self.lock:
+            row = self._db.execute(f"SELECT {', '.join(self.COLUMNS)} FROM orders WHERE order_id = ?", (order_id,)).fetchone()
+        return self._row_to_order(row) if row else default
+
+    def add(self, order):
+        """ Store a new order and return its id """
+        with self.lock:
+            order_id = self.next_order_id
+            self.next_order_id += 1
+            self._db.execute("BEGIN")
+            self._db.execute("INSERT INTO orders VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             (order_id,) + tuple(self._value(order, column) for column in self.COLUMNS))
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('next_order_id', ?)", (str(self.next_order_id),))
+            self._db.execute("COMMIT")
+        return order_id
+
+    # Time Complexity O(log n) 
+    def set_status(self, order_id, status, time_collected=None):
+        with self.lock:
+            return self._db.execute("UPDATE orders SET status = ?, time_collected = COALESCE(?, time_collected) WHERE order_id = ?",
+                                    (status, self._value({"time_collected": time_collected}, "time_collected"), order_id)).rowcount > 0
+
+    def query(self, search="", sort_by="id", descending=False, offset=0, limit=ORDERS_PAGE_SIZE):
+        """ Returns (total matching orders, [(order_id, order), ...] for one page), all filtering done in SQL """
+        clauses, params = [], []
+        for term in search.lower().split():
+            clauses.append("(CAST(order_id AS TEXT) = ? OR lower(pizza_type) LIKE ? OR lower(size) LIKE ? OR lower(status) LIKE ?)")
+            params += [term] + [f"%{term}%"] * 3
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        direction = "DESC" if descending else "ASC"
+        column = self.SORT_COLUMNS[sort_by]
+        with self.lock:
+            total = self._db.execute(f"SELECT COUNT(*) FROM orders {where}", params).fetchone()[0]
+            rows = self._db.execute(
+                f"SELECT order_id, {', '.join(self.COLUMNS)} FROM orders {where} "
+                f"ORDER BY {column} {direction}, order_id {direction} LIMIT ? OFFSET ?", params + [limit, offset]).fetchall()
+        return total, [(row[0], self._row_to_order(row[1:])) for row in rows]
+
+    def with_status(self, statuses):
+        """ [(order_id, order), ...] for every order in one of statuses, in id order, via the status index """
+        statuses = list(statuses)
+        placeholders = ", ".join("?" * len(statuses))
+        with self.lock:
+            rows = self._db.execute(
+                f"SELECT order_id, {', '.join(self.COLUMNS)} FROM orders WHERE status IN ({placeholders}) ORDER BY order_id",
+                statuses).fetchall()
+        return [(row[0], self._row_to_order(row[1:])) for row in rows]
+
+    def items(self):
+        """ [(order_id, order), ...] for every order, in id order """
+        with self.lock:
+            rows = self._db.execute(f"SELECT order_id, {', '.join(self.COLUMNS)} FROM orders ORDER BY order_id").fetchall()
+        return [(row[0], self._row_to_order(row[1:])) for row in rows]
+
+    def count_by(self, field):
+        column = {"pizza_type": "pizza_type", "size": "size", "status": "status"}[field]
+        with self.lock:
+            return dict(self._db.execute(f"SELECT {column}, COUNT(*) FROM orders GROUP BY {column}").fetchall())
+
+    def save_partial_selection(self, partial_selection):
+        self.session_store.save_partial_selection(partial_selection)
+
+    def close(self):
+        self.session_store.flush_partial_selection()
+        self.session_store.flush_analytics()
+        with self.lock:
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._db.close()
+
+def open_order_repository(store="json"):
+    if store == "sqlite":
+        return SQLiteOrderRepository()
+    return JsonOrderRepository()
+
+# Shutdown 
+SHUTDOWN_DEADLINE = 3.0 # Seconds the whole shutdown may take
+SHUTDOWN_SAVE_RESERVE = 1.0 # Of which kept back from draining the kitchen for saving the orders and log
+# Statuses an order can be left in when the app stops, and the pipeline stage it resumes from on the next start 
+RESUME_STAGES = {"Waiting": "register", "Registered": "register", "Cooking": "cook", "Ready to Collect": "collect"}
+# Statuses set only after cook_stage committed the order's ingredients, a resumed order must not take stock again
+STOCK_TAKEN_STATUSES = ("Cooking", "Ready to Collect")
+
+class LifecycleManager:
+    """ Runs the app's shutdown steps in order against one overall deadline: each step gets whatever time is
+    left and returns lines saying what it drained or persisted, which make up the shutdown report.
+    A step that fails is reported and the rest still run; calling shutdown again returns the first report. """
+    def __init__(self, deadline=SHUTDOWN_DEADLINE):
+        self.deadline = deadline
+        self.report = None
+        self._steps = [] # (name, step(seconds left) -> report lines)
+        self._lock = threading.Lock()
+
+    def register(self, name, step):
+        self._steps.append((name, step))
+
+    def shutdown(self):
+        with self._lock:
+            if self.report is not None:
+                return self.report
+            started = time.monotonic()
+            report = []
+            for name, step in self._steps:
+                remaining = max(0.0, self.deadline - (time.monotonic() - started))
+                try:
+                    lines = step(remaining) or []
+                except Exception as e:
+                    lines = [f"failed: {e}"]
+                report.extend(f"{name}: {line}" for line in lines)
+            report.append(f"Shutdown took {time.monotonic() - started:.2f}s of {self.deadline:.1f}s allowed")
+            self.report = report
+            return report
+
+# Startup profiling 
+class StartupProfiler:
+    """ Collects startup phase timings and prints them once the window is up and the session has loaded.
+    Only reports when enabled with --profile-startup. """
+    PHASES = ("import", "widget construction", "session load", "first paint")
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.phases = {}
+        self._lock = threading.Lock()
+        self._reported = False
+
+    def record(self, phase, seconds):
+        with self._lock:
+            self.phases[phase] = seconds
+            ready = not self._reported and all(name in self.phases for name in self.PHASES)
+            if ready:
+                self._reported = True
+        if ready and self.enabled:
+            print("Startup profile:")
+            for name in self.PHASES:
+                print(f"  {name:<20} {self.phases[name] * 1000:8.1f} ms")
 
 def get_icon_path():
     """Returns the absolute path to the icon file."""
@@ -176,34 +2824,121 @@ def get_icon_path():
 class PizzaShopApp:
     """ Managing UI and buisness logic. 
     Uses Model view controller-esc pattern with Tkinter for UI"""
-    def __init__(self, root):
+    def __init__(self, root, stage_workers=None, pure_stdlib=False, store="json", profiler=None,
+                 batch_window=BATCH_WINDOW, batch_capacity=BATCH_CAPACITY, policy=DEFAULT_POLICY,
+                 max_in_flight=MAX_IN_FLIGHT, max_held=MAX_HELD, metrics_window=METRICS_WINDOW, trace_file=TRACE_FILE,
+                 time_scale=1.0, max_wait=MAX_WAIT):
         self.root = root
+        self.profiler = profiler or StartupProfiler()
+        self.profiler.record("import", MODULE_IMPORT_SECONDS)
+        construction_started = time.perf_counter()
+        self.stage_workers = stage_workers
+        self.pure_stdlib = pure_stdlib
+        self.bridge = TkBridge(root)
+        self.bridge.start()
+        self.ui_bus = UIUpdateBus(root, self.apply_tree_updates)
+        self.ui_bus.start()
         self.root.title("Pizza Shop Application")
         self.root.iconbitmap("app_thumb.icns") 
-        self.start_workers()
-        self.order_lock = threading.Lock() # Initialise order_lock as an instance attribute
-        self.replenishment_needed = False 
         self.orders_processed = 0
-        self.start_workers()
+        self.metrics = OrderMetrics(window=metrics_window) # Stamps every status change, see set_order_status
+        self.scheduler = OrderScheduler(policy) # Decides which waiting order each stage takes next
+        # Restocks ahead of queued orders, also started lazily in start_workers
+        self.recipes = BillOfMaterials(pure_stdlib=pure_stdlib)
+        self.replenisher = ReplenishmentScheduler(inventory, on_replenish=self.flag_shopping_needed, recipes=self.recipes)
+        # Workers are only started with the first order, see start_workers
+        self.pipeline = KitchenPipeline(
+            handlers={
+                "register": self.register_stage,
+                "cook": self.cook_stage,
+                "collect": self.collect_stage,
+            },
+            on_complete=self.complete_order,
+            on_error=self.fail_order,
+            workers=stage_workers,
+            pure_stdlib=pure_stdlib,
+            batch_window=batch_window,
+            batch_capacity=batch_capacity,
+            pickup_delay=customer_pickup_delay, # Simulated customers collect from the ready shelf
+            time_scale=time_scale, # Below 1.0 the whole kitchen runs faster than real time, for benchmarks
+        )
+        # Decides whether a new order goes straight in, waits or is turned away
+        self.admission = AdmissionController(self.pipeline, max_in_flight=max_in_flight, max_held=max_held, max_wait=max_wait)
+        # Shutdown order for every worker, used by both the window close button and Save and Quit
+        self.lifecycle = LifecycleManager()
+        self.lifecycle.register("Waiting list", self.shutdown_waiting_list)
+        self.lifecycle.register("Kitchen", self.shutdown_kitchen)
+        self.lifecycle.register("Replenishment", self.shutdown_replenishment)
+        self.lifecycle.register("Order store", self.shutdown_order_store)
+        self.lifecycle.register("Order log", self.shutdown_order_log)
+        if tracer.enabled: # --trace
+            self.trace_file = trace_file
+            self.lifecycle.register("Trace", self.shutdown_trace)
+            self.root.bind(PROFILE_TOGGLE_KEY, self.toggle_profile)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         # print("Icon Path:", get_icon_path()) - TROUBLESHOOTING TOOL
 
-        # Start the replenishment worker thread
-        replenishment_thread = threading.Thread(target=self.replenish_inventory_worker) 
-        replenishment_thread.start() 
-
         # Simulation control variables 
         self.simulation_running = False
-        self.simulation_thread = None
-        self.executor = None
+        self.simulation_total = 0
+        self.simulation_runs = 0 # Numbers each run's order ids, so a late removal from one run never hits the next
 
         # Load session data i.e. window closed before an order is submitted, progress saved 
-        session_data = load_session()
-        self.orders = session_data["orders"]
-        self.next_order_id = session_data["next_order_id"]
-        self.partial_selection = session_data.get("partial_selection", {})
+        # This happens in the background while the window paints, see load_session_async
+        self.orders = None
+        self.analytics = None
+        self.order_lock = None
+        self.partial_selection = {}
+        self.session_loaded = threading.Event()
+        self.load_session_async(store)
 
         self.create_widgets()
-        self.restore_partial_selection()
+        self.profiler.record("widget construction", time.perf_counter() - construction_started)
+        self.root.after_idle(lambda: self.profiler.record("first paint", time.perf_counter() - _MODULE_STARTED))
+
+    def load_session_async(self, store):
+        """ Open the order store on a background thread; the partial selection is restored on the Tk thread after """
+        def _load():
+            started = time.perf_counter()
+            try:
+                try:
+                    orders = open_order_repository(store) # JSON session (default) or SQLite, same interface
+                    analytics = self.load_analytics(orders)
+                    error = orders.load_error
+                except Exception as e: # Never leave wait_for_session() blocked, carry on with an empty session
+                    print(f"Error loading session: {e}")
+                    moved = set_aside_session_files()
+                    orders = JsonOrderRepository()
+                    analytics = self.load_analytics(orders)
+                    error = (f"The saved session could not be loaded ({e}). Starting with a clean session."
+                             + (f" The old session files were kept as {', '.join(moved)}." if moved else ""))
+                self.orders = orders
+                self.order_lock = orders.lock # Guards the order store, held only for individual reads and writes
+                self.partial_selection = orders.partial_selection
+                self.analytics = analytics
+            finally:
+                self.session_loaded.set()
+            self.profiler.record("session load", time.perf_counter() - started)
+            if error:
+                self.bridge.call(messagebox.showerror, "Session Load Error", error)
+            self.bridge.call(self.restore_partial_selection)
+            self.bridge.call(self.resume_orders)
+            self.bridge.call(self.refresh_favourites)
+        threading.Thread(target=_load, name="session-loader", daemon=True).start()
+
+    def load_analytics(self, orders):
+        """ Saved running totals, or rebuilt once from the order history if they are missing or behind it """
+        data = orders.session_store.load_analytics()
+        if data is not None and data.get("orders") == len(orders):
+            analytics = OrderAnalytics(data)
+        else: # First start with analytics, or the app stopped before the last totals were written
+            analytics = OrderAnalytics.rebuild(orders.items())
+        analytics.on_change = orders.session_store.save_analytics
+        return analytics
+
+    def wait_for_session(self):
+        """ Anything that needs the orders waits here, normally the session has long finished loading """
+        self.session_loaded.wait()
 
     def show_error(self, message):
         self.error_label.config(text=message)
@@ -312,8 +3047,19 @@ class PizzaShopApp:
         ttk.Button(management_frame, text="Show All Orders", command=self.show_orders).grid(row=0, column=0, sticky="w")
         ttk.Button(management_frame, text="Generate Shopping List PDF", command=self.generate_shopping_list).grid(row=0, column=1, sticky="w")
         ttk.Button(management_frame, text="Generate Favourites Report", command=self.generate_favourites_report).grid(row=0, column=2, sticky="w")
-        ttk.Button(management_frame, text="Simulate Order Workflow", command=self.simulate_order_workflow).grid(row=0, column=3, sticky="w")
-        ttk.Button(management_frame, text="Save and Quit", command=self.save_and_quit).grid(row=0, column=4, sticky="w")
+        ttk.Button(management_frame, text="Export Order Log PDF", command=self.export_order_log).grid(row=0, column=3, sticky="w")
+        ttk.Button(management_frame, text="Kitchen Stats", command=self.show_kitchen_stats).grid(row=0, column=4, sticky="w")
+        ttk.Button(management_frame, text="Simulate Order Workflow", command=self.simulate_order_workflow).grid(row=0, column=5, sticky="w")
+        ttk.Button(management_frame, text="Deadline Report", command=self.generate_deadline_report).grid(row=0, column=6, sticky="w")
+        ttk.Button(management_frame, text="Live Metrics", command=self.show_metrics).grid(row=0, column=7, sticky="w")
+        ttk.Button(management_frame, text="Save and Quit", command=self.save_and_quit).grid(row=0, column=8, sticky="w")
+
+        # Favourites Frame
+        # Live top pizzas and takings, from the running analytics totals
+        favourites_frame = ttk.LabelFrame(main_frame, text="Favourites")
+        favourites_frame.grid(row=2, column=0, columnspan=2, sticky="nsew")
+        self.favourites_label = ttk.Label(favourites_frame, text="No orders yet")
+        self.favourites_label.grid(row=0, column=0, sticky="w")
     
     def filter_pizzas(self):
         """ Extra functionality """
@@ -335,12 +3081,40 @@ class PizzaShopApp:
 
     def save_partial_selection(self, *_):
         """ If the application is closed before submitting the order, aim to save their partial selection """
+        if not self.session_loaded.is_set():
+            return # Nothing to save over until the session has loaded
         partial_selection = {
             "pizza_type": self.pizza_type_var.get(),
             "size": self.size_var.get(),
             "quantity": self.qty_var.get()
         }
-        save_session(self.orders, self.next_order_id, partial_selection)
+        self.orders.save_partial_selection(partial_selection)
+
+    def submit_order(self, order_id, order, start_stage=None):
+        """ Hand an order to the admission layer, returns its (decision, eta seconds) """
+        if order["status"] not in STOCK_TAKEN_STATUSES:
+            try:
+                self.replenisher.expect(order_id, order)
+            except ValueError:
+                pass # cook_stage reports the invalid size through fail_order
+        return self.admission.admit(order_id, batch_key=(order["pizza_type"], order["size"]),
+                                    priority=self.scheduler.priority(order), start_stage=start_stage)
+
+    def resume_orders(self):
+        """ Put orders checkpointed by the last shutdown back into the kitchen, from the stage they stopped in """
+        unfinished = self.orders.with_status(RESUME_STAGES)
+        if not unfinished:
+            return
+        self.start_workers()
+        for order_id, order in unfinished:
+            self.add_order_to_tree(order_id, order["status"])
+            self.metrics.transition(order_id, order["status"], registered=registered_timestamp(order))
+            decision, _ = self.submit_order(order_id, order, start_stage=RESUME_STAGES[order["status"]])
+            if decision == "reject":
+                # Kitchen and waiting list are full, the rest keep their status for the next start
+                self.replenisher.fulfilled(order_id)
+                self.remove_from_tree(order_id)
+                break
 
     def restore_partial_selection(self):
         """ Retore partial selection once re-opened """
@@ -350,29 +3124,9 @@ class PizzaShopApp:
             self.qty_var.set(self.partial_selection.get("quantity", 1))
 
     def start_workers(self):
-        # Start worker threads
-        self.order_worker_thread = threading.Thread(target=self.order_worker, daemon=True)
-        # self.collection_worker_thread = threading.Thread(target=self.collection_worker, daemon=True)
-
-         # Start the threads
-        self.order_worker_thread.start()
-        """self.collection_worker_thread.start()
-        self.stop_collection_worker = False
-        print("Worker threads started")  # Debug print """
-    
-    def order_worker(self):
-        # Thread for processing orders - delegates process_order and terminates when not needed (None and break)
-        while not stop_flag.is_set():
-            order_id = order_queue.get()
-            if order_id is None:
-                break
-            self.process_order(order_id)
-            order_queue.task_done()
-
-            # Stopping condition so above doesn't indefinitely loop until it receives None 
-            if self.orders_processed >= 100:
-                collection_queue.put(None)
-                break 
+        # Start the kitchen pipeline and the replenishment scheduler, called lazily with the first order 
+        self.pipeline.start()
+        self.replenisher.start()
 
     def add_order(self):
         pizza_type = self.pizza_type_var.get()
@@ -386,171 +3140,148 @@ class PizzaShopApp:
             self.show_error("Please select both Pizza Type and Size.")
             return
         
-        order_id = self.next_order_id
-        self.orders[order_id] = {
+        self.wait_for_session()
+        self.start_workers()
+        # Turn the order away up front if the kitchen and its waiting list are both full, or the wait is too long
+        decision, eta = self.admission.quote()
+        if decision == "reject":
+            messagebox.showwarning("Kitchen Full", f"Sorry, we can't take any more orders right now. Please try again in {format_eta(eta)}.")
+            return
+
+        status = "Registered" if decision == "accept" else "Waiting"
+        order = {
             "pizza_type": pizza_type,
             "size": size,
             "quantity": quantity,
-            "status": "Registered",
+            "status": status,
             "time_registered": datetime.now(),
             "time_collected": None
         }
-        self.next_order_id += 1 # Increment the next order by one so all submissions are unique and in order 
-        save_session(self.orders, self.next_order_id)
-
-        self.track_tree.insert("", "end", values=(order_id, "Registered"))
-        threading.Thread(target=self.process_order, args=(order_id,)).start()
-        messagebox.showinfo("Order Placed", f'Your order has been placed. Your order number is {order_id}.')
-    
-     # Helper function to update inventory 
-    def update_inventory(self, pizza, action="decrement"):
-        with inventory_lock:
-            for ingredient, amount in pizza.items():
-                if action == "decrement":
-                    if INGREDIENTS[ingredient] < amount:
-                        self.replenishment_needed = True 
-                    INGREDIENTS[ingredient] -= amount
-                elif action == "increment":
-                    INGREDIENTS[ingredient] = min(MAX_INGREDIENTS, INGREDIENTS[ingredient] + amount)
-
-    def process_order(self, order_id):
+        order_id = self.orders.add(order)
+        self.metrics.transition(order_id, status)
+        self.analytics.record_order(order)
+        self.refresh_favourites()
+
+        self.add_order_to_tree(order_id, status)
+        decision, eta = self.submit_order(order_id, order)
+        if decision == "accept":
+            messagebox.showinfo("Order Placed", f'Your order has been placed. Your order number is {order_id}. It should be ready in {format_eta(eta)}.')
+        elif decision == "delay":
+            messagebox.showinfo("Order Placed", f'The kitchen is busy, your order number {order_id} is on the waiting list. It should be ready in {format_eta(eta)}.')
+        else: # The last waiting place went while this order was being taken
+            self.replenisher.fulfilled(order_id)
+            self.set_order_status(order_id, "Rejected")
+            messagebox.showwarning("Kitchen Full", f"Sorry, we can't take any more orders right now. Please try again in {format_eta(eta)}.")
+
+    def set_order_status(self, order_id, status):
+        """ Single place where an order changes status: the order store, the Order Track view, the log and the metrics. """
+        time_collected = datetime.now() if status == "Collected" else None
+        self.orders.set_status(order_id, status, time_collected=time_collected)
+        order = self.orders.get(order_id)
+        self.metrics.transition(order_id, status, registered=registered_timestamp(order) if order else None)
+        self.update_status_in_tree(order_id, status)
+        order_updates_to_file(order_id, status)
+
+    # Pipeline stage handlers, each runs when an order enters the stage 
+    @traced("kitchen")
+    def register_stage(self, order_id):
+        self.set_order_status(order_id, "Registered")
+
+    @traced("kitchen")
+    def cook_stage(self, order_id):
+        order = self.orders[order_id]
+        if order["status"] in STOCK_TAKEN_STATUSES:
+            return # Resumed after a restart, its ingredients were committed before it was marked Cooking
+        # Check and update inventory 
+        # Intra-order shopping requirement validation 
         try:
-            with self.order_lock:
-                # Step 1: Register
-                self.update_status_in_tree(order_id, "Registered")
-                time.sleep(TASK_DURATIONS["register_order"])
-                order_updates_to_file(order_id, "Registered")  # Log "Registered"
-
-                # Step 2: Check and update inventory 
-                size = self.orders[order_id]["size"].lower()
-                quantity = self.orders[order_id]["quantity"]
-                if size == "small":
-                    pizza = {"dough": 1, "sauce": 1, "toppings": 2}
-                elif size == "medium":
-                    pizza = {"dough": 2, "sauce": 1, "toppings": 3}
-                elif size == "large":
-                    pizza = {"dough": 3, "sauce": 2, "toppings": 4}
-                else:
-                    raise ValueError(f"Invalid size for order {order_id}")
-
-                # Intra-order shopping requirement validation 
-                for ingredient, amount in pizza.items():
-                    pizza[ingredient] *= quantity
-
-                # Check inventory and handle replenishment
-                insufficient_ingredients = []
-                for ingredient, amount in pizza.items():
-                    if INGREDIENTS[ingredient] < amount:
-                        insufficient_ingredients.append(ingredient)
-                        SHOPPING_NEEDED[ingredient] = True  # Flag for shopping list
-
-                if insufficient_ingredients:
-                    for ingredient in insufficient_ingredients:
-                        self.replenish_inventory(ingredient)
-                    messagebox.showinfo(
-                        "Inventory Replenished",
-                        f"Not enough of {', '.join(insufficient_ingredients)}. Replenished to {MAX_INGREDIENTS}. Resuming order processing."
-                    )
-
-                # Update inventory after potential replenishment
-                self.update_inventory(pizza) 
-
-                # Step 3: Start cooking
-                self.orders[order_id]["Status"] = "Cooking"
-                self.update_status_in_tree(order_id, "Cooking")
-                time.sleep(TASK_DURATIONS["cook_order"]) 
-                order_updates_to_file(order_id, "Cooking")  # Log "Cooking"
-
-                # Step 4: Simulate Collection
-                time.sleep(TASK_DURATIONS["collect_order"])
-                self.update_status_in_tree(order_id, "Ready to Collect")
-
-                time.sleep(1)
-                self.orders[order_id]["status"] = "Collected"
-                self.update_status_in_tree(order_id, "Collected")
-                order_updates_to_file(order_id, "Collected")  # Log "Collected"
-
-                # Schedule removal from tree after 2 seconds
-                self.root.after(2000, lambda oid=order_id: self.remove_from_tree(oid))
+            pizza = self.recipes.needs(order)
+        except ValueError:
+            raise ValueError(f"Invalid size for order {order_id}")
+
+        # Reserve everything the order needs in one atomic step. The replenishment scheduler has normally
+        # restocked already, this is the fallback for orders it could not see coming
+        reservation_id = inventory.reserve(pizza)
+        if reservation_id is None:
+            insufficient_ingredients = inventory.shortfall(pizza)
+            for ingredient in insufficient_ingredients:
+                SHOPPING_NEEDED[ingredient] = True  # Flag for shopping list
+                self.replenish_inventory(ingredient)
+            self.bridge.call(
+                messagebox.showinfo,
+                "Inventory Replenished",
+                f"Not enough of {', '.join(insufficient_ingredients)}. Replenished to {MAX_INGREDIENTS}. Resuming order processing."
+            )
+            # An order bigger than a full shelf still goes ahead and overdraws, as it always has
+            reservation_id = inventory.reserve(pizza) or inventory.reserve(pizza, allow_overdraw=True)
+
+        inventory.commit(reservation_id)
+        self.replenisher.fulfilled(order_id)
+        self.set_order_status(order_id, "Cooking")
+
+    @traced("kitchen")
+    def collect_stage(self, order_id):
+        self.set_order_status(order_id, "Ready to Collect")
+
+    def complete_order(self, order_id):
+        self.set_order_status(order_id, "Collected")
+        self.analytics.record_collected(self.orders[order_id])
+        self.bridge.call(self.refresh_favourites)
+        self.orders_processed += 1
+        # Schedule removal from tree after 2 seconds
+        self.bridge.call(self.ui_bus.remove, order_id, delay=2000)
+
+    def fail_order(self, order_id, error):
+        self.replenisher.fulfilled(order_id)
+        self.bridge.call(messagebox.showerror, "Process Error", f"Error processing order {order_id}: {error}")
+        self.set_order_status(order_id, "Error")
+
+    def show_kitchen_stats(self):
+        lines = format_kitchen_stats(self.pipeline.stats())
+        lines.append(f"Waiting list: {self.admission.held()} held, {self.admission.rejected} turned away")
+        messagebox.showinfo("Kitchen Stats", "\n".join(lines))
+
+    def toggle_profile(self, event=None):
+        """ PROFILE_TOGGLE_KEY under --trace: cProfile the Tk thread between two presses """
+        self.show_error(tracer.toggle_profile())
+
+    def show_metrics(self):
+        """ Rolling stage latency percentiles and throughput, refreshed every METRICS_REFRESH_MS """
+        metrics_window = tk.Toplevel(self.root)
+        metrics_window.title("Live Metrics")
+        text = ttk.Label(metrics_window, text="", font=("Courier", 11), justify="left")
+        text.pack(fill="both", expand=True, padx=10, pady=10)
+
+        def export():
+            filename = self.metrics.export()
+            messagebox.showinfo("Metrics Exported", f"Metrics saved to {filename}", parent=metrics_window)
+
+        def refresh():
+            if not metrics_window.winfo_exists():
+                return
+            text.config(text="\n".join(format_metrics(self.metrics.snapshot())))
+            metrics_window.after(METRICS_REFRESH_MS, refresh)
 
-        except Exception as e:
-            messagebox.showerror("Process Error", f"Error processing order {order_id}: {str(e)}")
-            self.update_status_in_tree(order_id, "Error")
-            order_updates_to_file(order_id, "Error")  # Log "Error" 
+        ttk.Button(metrics_window, text="Export JSON", command=export).pack(side="left", padx=10, pady=(0, 10))
+        ttk.Button(metrics_window, text="Close", command=metrics_window.destroy).pack(side="left", pady=(0, 10))
+        refresh()
 
     def replenish_inventory(self, ingredient):
-        # Replenish the inventory of a specific ingredient and log it.
-        with inventory_lock:
-            current_amount = INGREDIENTS[ingredient]
-            if current_amount <= 0: # Only replenish when at zero or below
-                INGREDIENTS[ingredient] = MAX_INGREDIENTS
-                return f"Replenished {ingredient} from {current_amount} to {MAX_INGREDIENTS}"
-            return None
-
-    def replenish_inventory_worker(self):
-        # replenish the inventory in a background thread 
-        while not stop_flag.is_set():
-            if self.replenishment_needed:
-                with inventory_lock: 
-                    for ingredient, amount in INGREDIENTS.items():
-                        if amount <= 0:
-                            self.replenish_inventory(ingredient) 
-                self.replenishment_needed = False 
-            time.sleep(1)
-        
-    """SORRY REALLY COULDNT GET THIS WORKING - I SPENT DAYS ON IT. :(
-    def collection_worker(self):
-        print("Collection worker started")  # Debug print
-        while not self.stop_collection_worker:
-            try:
-                print("Waiting for order in collection queue")  # Debug print
-                order_id = collection_queue.get(block=True, timeout=1) 
-                print(f"Collection worker received order: {order_id}")  # Debug print
-
-                if order_id is None:  # termination condition
-                    print("Received termination signal")
-                    break
-
-                time.sleep(TASK_DURATIONS["collect_order"])
-                self.update_status_in_tree(order_id, "Ready to Collect")
-
-                time.sleep(1)
-                self.orders[order_id]["status"] = "Collected"
-                self.update_status_in_tree(order_id, "Collected")
-                order_updates_to_file(order_id, "Collected")
-
-                # Schedule removal from tree after 2 seconds
-                self.root.after(2000, lambda oid=order_id: self.remove_from_tree(oid))
-
-                collection_queue.task_done()
+        # Replenish the inventory of a specific ingredient back to MAX_INGREDIENTS and log it.
+        return inventory.replenish(ingredient)
 
-            except Empty:
-                continue  # Just continue waiting
-            except Exception as e:
-                print(f"Error in collection worker: {e}")
+    def flag_shopping_needed(self, ingredient, message):
+        # Called by the replenishment scheduler, so restocks show up on the shopping list 
+        SHOPPING_NEEDED[ingredient] = True
 
-    def on_closing(self):
-        # Gracefully terminate the application and worker threads 
-        self.stop_collection_worker = True  # Signal the thread to stop
-        collection_queue.put(None)  # Put a termination signal on the queue
-        self.collection_worker_thread.join()  # Wait for the thread to finish
-        self.root.destroy() """
-    
+    @traced("tk")
     def remove_from_tree(self, order_id_to_remove):
         """Safely remove an order from the tree view."""
         try:
-            # Convert order_id_to_remove to string to match tree values, or int if needed
+            # Rows use the order id as their Treeview iid, so this is an O(1) lookup rather than a scan
             order_id_str = str(order_id_to_remove)
-            print(f"Removing order {order_id_str} from tree...")
-
-            for item in self.track_tree.get_children():
-                # Adjust the index to the column where the order ID is located (0 is the first column)
-                order_id_from_tree = str(self.track_tree.item(item)["values"][0])  # or use int() if necessary
-
-                if order_id_from_tree == order_id_str:
-                    self.track_tree.delete(item)
-                    print(f"Order {order_id_str} removed from tree.")
-                    break
+            if self.track_tree.exists(order_id_str):
+                self.track_tree.delete(order_id_str)
             else:
                 print(f"Order {order_id_str} not found in tree.")
         except Exception as e:
@@ -559,65 +3290,89 @@ class PizzaShopApp:
 
     """Management Frame Logic"""            
     def show_orders(self):
-        # Create a new Toplevel window for displaying orders
+        """ Virtualised order browser: only the current page of rows is materialised, paging, sorting and
+        search are answered by the order store's index (or SQL), so opening it costs the same for 10 or 100k orders """
+        self.wait_for_session()
         orders_window = tk.Toplevel(self.root)
         orders_window.title("All Orders")
-        orders_window.geometry("400x400")  # Adjust as needed for your UI design
+        orders_window.geometry("640x480")  # Adjust as needed for your UI design
         orders_window.resizable(True, True)
 
-        # Style configuration
-        style = ttk.Style()
-        style.configure("TLabel", font=("Helvetica", 12), padding=5)
+        state = {"page": 0, "sort_by": "id", "descending": False}
+
+        # Search and sort controls
+        controls = ttk.Frame(orders_window)
+        controls.pack(fill="x", padx=10, pady=(10, 0))
+        ttk.Label(controls, text="Search: ").pack(side="left")
+        search_var = tk.StringVar()
+        ttk.Entry(controls, textvariable=search_var, width=30).pack(side="left")
+        page_label = ttk.Label(controls, text="")
+        page_label.pack(side="right")
 
-        # Main container frame
+        # Only ORDERS_PAGE_SIZE rows ever exist in this Treeview
+        columns = ("Order ID", "Pizza Type", "Size", "Quantity", "Status")
         container = ttk.Frame(orders_window)
         container.pack(fill="both", expand=True, padx=10, pady=10)
-
-        # Scrollable area setup
-        canvas = tk.Canvas(container)
-        scrollbar = ttk.Scrollbar(container, orient="vertical", command=canvas.yview)
-        scrollable_frame = ttk.Frame(canvas)
-
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-
-        # Pack canvas and scrollbar
-        canvas.pack(side="left", fill="both", expand=True)
+        tree = ttk.Treeview(container, columns=columns, show="headings")
+        scrollbar = ttk.Scrollbar(container, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
 
-        # Populate the scrollable frame with orders
-        ttk.Label(scrollable_frame, text="Order Details", font=("Helvetica", 14, "bold")).pack(anchor="w", pady=5)
-        for order_id, details in self.orders.items():
-            order_text = (
-                f"Order ID: {order_id}\n"
-                f"Quantity: {details['quantity']}\n"
-                f"Pizza Type: {details['pizza_type']}\n"
-                f"Status: {details['status']}\n"
-                f"{'-' * 30}"
-            )
-            ttk.Label(scrollable_frame, text=order_text, justify="left", anchor="w").pack(fill="x", pady=5)
-
-        # Close button
-        close_button = ttk.Button(orders_window, text="Close", command=orders_window.destroy)
-        close_button.pack(pady=10, side="bottom")
-
-
+        def refresh(*_):
+            total, rows = self.orders.query(
+                search_var.get(), state["sort_by"], state["descending"],
+                offset=state["page"] * ORDERS_PAGE_SIZE, limit=ORDERS_PAGE_SIZE)
+            pages = max(1, -(-total // ORDERS_PAGE_SIZE))
+            if state["page"] >= pages:
+                state["page"] = pages - 1
+                return refresh()
+            tree.delete(*tree.get_children())
+            for order_id, details in rows:
+                tree.insert("", "end", values=(order_id, details.get("pizza_type"), details.get("size"),
+                                               details.get("quantity"), details.get("status")))
+            page_label.config(text=f"Page {state['page'] + 1} of {pages} ({total} orders)")
+
+        def sort_by(column):
+            key = ORDER_SORT_KEYS[column]
+            state["descending"] = not state["descending"] if state["sort_by"] == key else False
+            state["sort_by"] = key
+            state["page"] = 0
+            refresh()
+
+        def turn_page(step):
+            state["page"] = max(0, state["page"] + step)
+            refresh()
+
+        def new_search(*_):
+            state["page"] = 0
+            refresh()
+
+        for column in columns:
+            if column in ORDER_SORT_KEYS:
+                tree.heading(column, text=column, command=lambda c=column: sort_by(c))
+            else:
+                tree.heading(column, text=column)
+            tree.column(column, width=110)
+        search_var.trace_add("write", new_search)
+
+        # Paging and close buttons
+        buttons = ttk.Frame(orders_window)
+        buttons.pack(pady=10, side="bottom")
+        ttk.Button(buttons, text="< Prev", command=lambda: turn_page(-1)).pack(side="left")
+        ttk.Button(buttons, text="Next >", command=lambda: turn_page(1)).pack(side="left")
+        ttk.Button(buttons, text="Close", command=orders_window.destroy).pack(side="left", padx=(20, 0))
+        refresh()
 
     def generate_shopping_list(self):
         """ Generate the shopping list PDF """
         shopping_list = []
         current_time = datetime.now()
         
-        #with inventory_lock:
         # Check which ingredients were flagged as needed
         for ingredient, needed in SHOPPING_NEEDED.items():
             if needed:
-                current_amount = INGREDIENTS[ingredient]
+                current_amount = inventory.stock(ingredient)
                 shopping_list.append(
                     f"We need to order {MAX_INGREDIENTS - current_amount} units of {ingredient} (Current stock: {current_amount})"
                 )
@@ -633,210 +3388,222 @@ class PizzaShopApp:
             generate_pdf("Shopping_list_1_2.pdf", content)
             messagebox.showinfo("Shopping List", "Shopping list generated. Please check for file: shopping_list_1_2.pdf")
 
+
+    def export_order_log(self):
+        """ Export the order event log to PDF on request rather than after every status change """
+        count, volumes = report_writer.render_now()
+        if not volumes:
+            messagebox.showinfo("Order Log", "The order log is empty.")
+            return
+        messagebox.showinfo("Order Log", f"Order log exported ({count} entries). Please check for files: {volumes[0]} to {volumes[-1]}")
     
     def update_status_in_tree(self, order_id, status):
         """ key bit of code to be called at each process_order status.
-            This is also used by the workflow simulator. """
-        def _update():
-            try:
-                order_id_str = str(order_id) 
-                for item in self.track_tree.get_children():
-                    if self.track_tree.item(item, "values")[0] == order_id_str:
-                        self.track_tree.item(item, values=(order_id_str, status))
-                        return 
-            except Exception as e:
-                print(f"Error updating tree: {e}")
+            This is also used by the workflow simulator. Safe from any thread: the change goes on the
+            UI update bus and is applied with the rest of its frame by apply_tree_updates. """
+        self.ui_bus.push(order_id, status)
+
+    @traced("tk")
+    def apply_tree_updates(self, updates):
+        """ Apply one frame of coalesced {order id: status} changes, a None status removes the row """
+        for order_id_str, status in updates.items(): # Order ids are also the row iids, see add_order_to_tree
+            if not self.track_tree.exists(order_id_str):
+                continue
+            if status is None:
+                self.track_tree.delete(order_id_str)
+            else:
+                self.track_tree.item(order_id_str, values=(order_id_str, status))
 
-        self.root.after(0, _update)
+    # Time Complexity O(k) for k pizza types, independent of the number of orders 
+    def refresh_favourites(self):
+        if self.analytics is None or not self.analytics.orders:
+            return
+        names = {pizza_type.lower(): pizza_type for pizza_type in PIZZA_TYPES}
+        top = "   ".join(f"{rank}. {names.get(pizza, pizza)} ({count})"
+                         for rank, (pizza, count) in enumerate(self.analytics.top_pizzas(FAVOURITES_SHOWN), 1))
+        self.favourites_label.config(text=f"{top}   Takings: £{self.analytics.revenue:.2f}")
 
     def generate_favourites_report(self):
         """ Code to generate the sorted favourites report pdf """
-        favourites = {} # Empty dictionary 
-        for order in self.orders.values():
-            pizza_name = order['pizza_type'].lower()
-            favourites[pizza_name] = favourites.get(pizza_name, 0) + 1
-
-        sorted_favourites = sorted(favourites.items(), key=lambda x: x[1], reverse=True)
-        report_lines = [f"{pizza}: Ordered {count} times" for pizza, count in sorted_favourites]
+        self.wait_for_session()
+        report_lines = format_favourites_report(self.analytics) # Running totals, no pass over the order history
         generate_pdf("favourites_report_1_2.pdf", report_lines)
         messagebox.showinfo("Favourites Report", "Favourites report generated.") # Let the user know the pdf has been generated successfully 
 
+    def generate_deadline_report(self):
+        """ Replay a generate_random_orders workload under each scheduling policy and report deadline misses """
+        report_lines = format_policy_report(compare_policies(self.generate_random_orders(), workers=self.stage_workers))
+        generate_pdf("deadline_report_1_2.pdf", report_lines)
+        messagebox.showinfo("Deadline Report", "\n".join(report_lines))
+
 
     """1.2B SIMUALTE ORDER WORKFLOW IN JSON"""
-    def process_single_order(self, order_id):
-    # Process a single order through all stages
-        try:
-            # Register
-            self.root.after(0, self.update_status_in_tree, order_id, "Registered")
-            time.sleep(TASK_DURATIONS["register_order"])
-            
-            # Cooking
-            self.root.after(0, self.update_status_in_tree, order_id, "Cooking")
-            time.sleep(TASK_DURATIONS["cook_order"])
-            
-            # Add to collection queue in order
-            with self.processing_lock:
-                self.collection_order.append(order_id)
-                
-            # Ready for collection
-            self.root.after(0, self.update_status_in_tree, order_id, "Ready for Collection")
-            time.sleep(TASK_DURATIONS["collect_order"])
-            
-            # Collected
-            self.root.after(0, self.update_status_in_tree, order_id, "Collected")
-            
-            # Remove from tree after a delay
-            self.root.after(2000, self.remove_order_from_tree, order_id)
-            
-            with self.processing_lock:
-                self.orders_processed += 1
-                if self.orders_processed == SIMULATION_ORDERS:
-                    self.root.after(0, lambda: messagebox.showinfo("Simulation Complete",
-                        f"All {SIMULATION_ORDERS} orders have been processed!"))
-                    
-        except Exception as e:
-            print(f"Error processing order {order_id}: {str(e)}")
+    def simulation_handlers(self):
+        """ Stage handlers for simulated orders: they only drive the Order Track view """
+        def stage_status(status):
+            def handler(order_id):
+                if not self.simulation_running:
+                    raise RuntimeError("Simulation stopped")
+                self.update_status_in_tree(order_id, status)
+                self.metrics.transition(order_id, metrics_status)
+            metrics_status = "Ready to Collect" if status == "Ready for Collection" else status # Same names as real orders
+            return handler
+        return {
+            "register": stage_status("Registered"),
+            "cook": stage_status("Cooking"),
+            "collect": stage_status("Ready for Collection"),
+        }
 
-    def remove_order_from_tree(self, order_id):
-        """Safely remove an order from the tree view"""
-        for item in self.track_tree.get_children():
-            if self.track_tree.item(item)["values"][0] == str(order_id):
-                self.track_tree.delete(item)
-                break
+    def complete_simulated_order(self, order_id):
+        self.update_status_in_tree(order_id, "Collected")
+        self.metrics.transition(order_id, "Collected")
+        # Remove from tree after a delay
+        self.bridge.call(self.ui_bus.remove, order_id, delay=2000)
+        self._simulated_order_done()
+
+    def reject_simulated_order(self, order_id):
+        # Turned away by admission control, it still counts towards the end of the run
+        self.metrics.transition(order_id, "Rejected")
+        self.ui_bus.remove(order_id)
+        self._simulated_order_done()
+
+    def _simulated_order_done(self):
+        with self.processing_lock:
+            self.orders_processed += 1
+            finished = self.orders_processed == self.simulation_total
+        if finished:
+            self.simulation_running = False
+            self.bridge.call(messagebox.showinfo, "Simulation Complete", f"All {self.simulation_total} orders have been processed!")
+
+    def fail_simulated_order(self, order_id, error):
+        self.metrics.transition(order_id, "Error")
+        if self.simulation_running:
+            print(f"Error processing order {order_id}: {str(error)}")
+        self.ui_bus.remove(order_id)
 
     def generate_random_orders(self):
-        """Generate 30 random orders and save to JSON"""
-        orders = {}
-        for i in range(SIMULATION_ORDERS):
-            order_id = i + 1
-            orders[str(order_id)] = {
-                "pizza_type": random.choice(PIZZA_TYPES),
-                "size": random.choice(SIZES),
-                "quantity": random.randint(1, 3),
-                "status": "Pending",
-                "time_registered": datetime.now().isoformat()
-            }
-        
-        with open("simulation_orders.json", "w") as f:
-            json.dump(orders, f, indent=4, default=str)
+        """Generate SIMULATION_ORDERS weighted random orders and save them to WORKLOAD_FILE as NDJSON"""
+        # Stamped from now, not opening time, so EDF deadlines match orders entering the kitchen today
+        orders = dict(WorkloadGenerator(start=datetime.now()).orders(SIMULATION_ORDERS))
+        write_workload(orders.items())
         return orders
 
     def simulate_order_workflow(self):
-        """Start the simulation workflow in a separate thread"""
+        """Feed the simulated orders into the kitchen pipeline, each one runs as a coroutine"""
         if self.simulation_running:
             messagebox.showinfo("Simulation", "Simulation already running!")
             return
         self.simulation_running = True
-        self.simulation_thread = threading.Thread(target=self._run_simulation)
-        self.simulation_thread.daemon = True  # Make thread daemon so it closes with app
-        self.simulation_thread.start()
-    
-    def _run_simulation(self):
-        """Internal method to run the simulation"""
+        self.start_workers()
         try:
             # Initialize simulation variables
             self.orders_processed = 0
-            self.collection_order = []
             self.processing_lock = threading.Lock()
             
             # Clear existing items in tree
-            self.root.after(0, self._clear_tree)
+            self._clear_tree()
             
             # Generate random orders
             simulation_orders = self.generate_random_orders()
-            
-            # Process orders sequentially instead of in parallel
-            for order_id in simulation_orders.keys():
-                if not self.simulation_running:
-                    break
-                    
-                # Add order to tree
-                self.root.after(0, self.add_order_to_tree, order_id, "Pending")
-                
-                # Process the order
-                self.process_single_order(order_id)
-                
-            if self.simulation_running:
-                self.root.after(0, lambda: messagebox.showinfo("Simulation Complete",
-                    f"All {SIMULATION_ORDERS} orders have been processed!"))
+            self.simulation_total = len(simulation_orders)
+            self.simulation_runs += 1
+            handlers = self.simulation_handlers()
+            for order_id, order in simulation_orders.items():
+                sim_id = f"S{self.simulation_runs}-{order_id}" # Apart from real order numbers and from earlier runs
+                self.add_order_to_tree(sim_id, "Pending")
+                self.metrics.transition(sim_id, "Waiting")
+                # Through admission control like counter orders, so the simulation cannot crowd them out
+                decision, _ = self.admission.admit(sim_id, handlers=handlers,
+                                                   on_complete=self.complete_simulated_order, on_error=self.fail_simulated_order,
+                                                   batch_key=(order["pizza_type"], order["size"]), priority=self.scheduler.priority(order))
+                if decision == "delay":
+                    self.update_status_in_tree(sim_id, "Waiting")
+                elif decision == "reject":
+                    self.reject_simulated_order(sim_id)
                     
         except Exception as e:
-            self.root.after(0, lambda: messagebox.showerror("Simulation Error", 
-                f"Error during simulation: {str(e)}"))
-            
-        finally:
             self.simulation_running = False
+            messagebox.showerror("Simulation Error", f"Error during simulation: {str(e)}")
     
     def _clear_tree(self):
         """Safely clear the tree view"""
-        for item in self.track_tree.get_children():
-            self.track_tree.delete(item)
-    
-    def process_single_order(self, order_id):
-        """Process a single order through all stages"""
-        if not self.simulation_running:
-            return
-            
-        try:
-            # Register
-            self.root.after(0, self.update_status_in_tree, order_id, "Registered")
-            time.sleep(TASK_DURATIONS["register_order"])
-            
-            if not self.simulation_running:
-                return
-                
-            # Cooking
-            self.root.after(0, self.update_status_in_tree, order_id, "Cooking")
-            time.sleep(TASK_DURATIONS["cook_order"])
-            
-            if not self.simulation_running:
-                return
-                
-            # Ready for collection
-            self.root.after(0, self.update_status_in_tree, order_id, "Ready for Collection")
-            time.sleep(TASK_DURATIONS["collect_order"])
-            
-            if not self.simulation_running:
-                return
-                
-            # Collected
-            self.root.after(0, self.update_status_in_tree, order_id, "Collected")
-            
-            with self.processing_lock:
-                self.orders_processed += 1
-            
-            # Remove from tree after a delay
-            self.root.after(2000, self.remove_order_from_tree, order_id)
-            
-        except Exception as e:
-            print(f"Error processing order {order_id}: {str(e)}")
+        self.track_tree.delete(*self.track_tree.get_children())
     
+    # Shutdown steps, run in this order by self.lifecycle 
+    def shutdown_waiting_list(self, remaining):
+        held = self.admission.close()
+        if not held:
+            return ["empty"]
+        waiting = [order_id for order_id in held if not str(order_id).startswith("S")]
+        lines = [f"{len(waiting)} held orders left as Waiting, they resume on the next start"] if waiting else []
+        if len(held) > len(waiting):
+            lines.append(f"{len(held) - len(waiting)} held simulated orders dropped")
+        return lines
+
+    def shutdown_kitchen(self, remaining):
+        self.simulation_running = False
+        # Leave time for the order store and log after draining the kitchen
+        result = self.pipeline.shutdown(timeout=max(0.1, remaining - SHUTDOWN_SAVE_RESERVE))
+        lines = [f"{result['completed']} orders collected this session"]
+        interrupted = [(order_id, stage) for order_id, stage in result["interrupted"].items() if not str(order_id).startswith("S")]
+        simulated = len(result["interrupted"]) - len(interrupted)
+        if interrupted:
+            lines.append(f"{len(interrupted)} unfinished orders checkpointed, they resume on the next start: "
+                         + ", ".join(f"#{order_id} ({stage})" for order_id, stage in sorted(interrupted, key=lambda item: order_sort_key(item[0]))))
+        if simulated:
+            lines.append(f"{simulated} simulated orders dropped")
+        return lines
+
+    def shutdown_replenishment(self, remaining):
+        self.replenisher.stop(timeout=min(remaining, 1.0))
+        return [f"stopped after {self.replenisher.replenishments} restocks"]
+
+    def shutdown_order_store(self, remaining):
+        if not self.session_loaded.wait(remaining):
+            return ["session was still loading, nothing new to save"]
+        statuses = self.orders.count_by("status")
+        unfinished = sum(statuses.get(status, 0) for status in RESUME_STAGES)
+        self.orders.close()
+        return [f"{sum(statuses.values())} orders saved, {unfinished} of them to resume"]
+
+    def shutdown_order_log(self, remaining):
+        unwritten = report_writer.close(timeout=max(0.1, remaining))
+        line = f"{report_writer.written} events written"
+        if unwritten:
+            line += f", {unwritten} not written in time"
+        return [line]
+
+    def shutdown_trace(self, remaining):
+        lines = []
+        if tracer.profiling:
+            lines.append(tracer.toggle_profile())
+        lines.append(f"{tracer.write(self.trace_file)} events written to {self.trace_file}")
+        return lines
+
+    def shutdown(self):
+        """ Drain or checkpoint everything within SHUTDOWN_DEADLINE, returns the report of what was persisted """
+        report = self.lifecycle.shutdown()
+        stop_flag.set() # Anything left polling the flag stops too
+        print("\n".join(report))
+        return report
+
     def on_closing(self):
         """Handle window closing"""
         try:
-            # Stop simulation if running
-            self.simulation_running = False
-            
-            if self.executor:
-                self.executor.shutdown(wait=False)
-            
-            if self.simulation_thread and self.simulation_thread.is_alive():
-                # Give the simulation thread a moment to clean up
-                self.simulation_thread.join(timeout=1.0)
-            
-            # Save final state
-            save_session(self.orders, self.next_order_id)
-            
-            # Destroy the window
-            self.root.destroy()
-            
+            self.shutdown()
         except Exception as e:
             print(f"Error during cleanup: {e}")
-            self.root.destroy()
+        self.root.destroy()
 
 
+    @traced("tk")
     def add_order_to_tree(self, order_id, status):
-        self.track_tree.insert("", "end", values=(order_id, status))
+        """ The order id doubles as the row's iid, which keeps updates and removals O(1) """
+        order_id_str = str(order_id)
+        if self.track_tree.exists(order_id_str):
+            self.track_tree.item(order_id_str, values=(order_id_str, status))
+        else:
+            self.track_tree.insert("", "end", iid=order_id_str, values=(order_id_str, status))
 
     def save_and_quit(self):
         """Save data and exit application gracefully, with a force quit option.
@@ -853,22 +3620,95 @@ class PizzaShopApp:
             
             # Force stop the simulation
             self.simulation_running = False
-            if self.simulation_thread and self.simulation_thread.is_alive():
-                self.simulation_thread.join(timeout=1.0)  # Wait briefly for thread to halt
 
         try:
-            # Save any necessary data before quitting
-            save_session(self.orders, self.next_order_id)
+            # Drain the kitchen, checkpoint unfinished orders and save everything, within SHUTDOWN_DEADLINE
+            report = self.shutdown()
+            messagebox.showinfo("Saved", "\n".join(report))
 
-            stop_flag.set()  # Signal threads to stop
-            
             # Destroy the main application window
             self.root.destroy()
         except Exception as e:
             messagebox.showerror("Error", f"Error during quit: {str(e)}")
 
 
+MODULE_IMPORT_SECONDS = time.perf_counter() - _MODULE_STARTED
+
+
+def parse_args(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Sagir's Pizza Shop")
+    parser.add_argument("--registers", type=int, default=STAGE_WORKERS["register"], help="Register stage workers")
+    parser.add_argument("--ovens", type=int, default=STAGE_WORKERS["cook"], help="Cook stage workers")
+    parser.add_argument("--pure-stdlib", action="store_true", help="Use the standard asyncio event loop and plain-Python recipe maths even if uvloop or NumPy is installed")
+    parser.add_argument("--store", choices=["json", "sqlite"], default="json", help="Order store: JSON session file or SQLite database")
+    parser.add_argument("--profile-startup", action="store_true", help="Report time spent in import, widget construction and session load")
+    parser.add_argument("--batch-window", type=float, default=BATCH_WINDOW, help="Seconds a part-filled oven batch waits for matching orders")
+    parser.add_argument("--batch-size", type=int, default=BATCH_CAPACITY, help="Orders per oven batch, 1 cooks every order alone")
+    parser.add_argument("--policy", choices=SCHEDULING_POLICIES, default=DEFAULT_POLICY, help="Order scheduling policy: fifo, shortest job first or earliest deadline first")
+    parser.add_argument("--compare-policies", action="store_true", help="With --headless-sim, report deadline misses under every scheduling policy")
+    parser.add_argument("--max-in-flight", type=int, default=MAX_IN_FLIGHT, help="Orders in the kitchen at once before new ones are held")
+    parser.add_argument("--max-held", type=int, default=MAX_HELD, help="Orders held on the waiting list before new ones are turned away")
+    parser.add_argument("--max-wait", type=float, default=MAX_WAIT, help="Seconds of estimated wait beyond which new orders are turned away")
+    parser.add_argument("--metrics-window", type=float, default=METRICS_WINDOW, help="Seconds of history covered by the Live Metrics window")
+    parser.add_argument("--trace", action="store_true", help="Record span timings and lock waits as Chrome trace JSON, F9 toggles cProfile")
+    parser.add_argument("--trace-file", default=TRACE_FILE, help="Where --trace writes its trace on quit")
+    parser.add_argument("--headless-sim", type=int, metavar="ORDERS", help="Run a virtual-clock simulation without the UI and exit")
+    parser.add_argument("--arrival-interval", type=float, help="Virtual seconds between simulated arrivals, instead of each order's own arrival time (0 if it has none)")
+    parser.add_argument("--workload", metavar="FILE", help="Replay an NDJSON workload (see --generate) in the headless simulator and exit")
+    parser.add_argument("--generate", type=int, metavar="ORDERS", help="Stream ORDERS synthetic orders to --workload-file as NDJSON and exit")
+    parser.add_argument("--workload-file", default=WORKLOAD_FILE, help="Where --generate writes its orders")
+    parser.add_argument("--arrival", choices=ARRIVAL_PROCESSES, help=f"Arrival process for --generate (default {DEFAULT_ARRIVAL}) and --headless-sim")
+    parser.add_argument("--rate", type=float, default=DEFAULT_ORDER_RATE, help="Average orders per hour for --arrival")
+    parser.add_argument("--seed", type=int, help="Random seed for simulated orders")
+    parser.add_argument("--json", metavar="FILE", help="Also write headless simulation results to a JSON file")
+    args = parser.parse_args(argv)
+    if not args.rate > 0:
+        parser.error(f"--rate must be a positive number of orders per hour, got {args.rate}")
+    return args
+
+def generate_workload(args):
+    generator = WorkloadGenerator(seed=args.seed, arrival=args.arrival or DEFAULT_ARRIVAL, rate=args.rate)
+    started = time.perf_counter()
+    count = write_workload(generator.orders(args.generate), args.workload_file)
+    print(f"Wrote {count} {generator.arrival} orders to {args.workload_file} in {time.perf_counter() - started:.1f}s")
+
+def run_headless(args, stage_workers):
+    if args.workload:
+        open_orders = lambda: read_workload(args.workload)
+    elif args.arrival:
+        open_orders = lambda: WorkloadGenerator(seed=args.seed, arrival=args.arrival, rate=args.rate).orders(args.headless_sim)
+    else:
+        orders = random_orders(args.headless_sim, seed=args.seed)
+        open_orders = orders.items
+    if args.compare_policies:
+        results = compare_policies(open_orders, arrival_interval=args.arrival_interval, workers=stage_workers,
+                                   batch_window=args.batch_window, batch_capacity=args.batch_size)
+        print("\n".join(format_policy_report(results)))
+    else:
+        results = simulate_workload(open_orders(), args.policy, arrival_interval=args.arrival_interval, workers=stage_workers,
+                                    batch_window=args.batch_window, batch_capacity=args.batch_size)
+        print("\n".join(format_simulation_results(results)))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    stage_workers = {"register": args.registers, "cook": args.ovens}
+    if args.generate:
+        generate_workload(args)
+        raise SystemExit(0)
+    if args.headless_sim or args.workload:
+        run_headless(args, stage_workers)
+        raise SystemExit(0)
+    if args.trace:
+        tracer.start()
     root = tk.Tk()
-    app = PizzaShopApp(root)
+    app = PizzaShopApp(root, stage_workers=stage_workers, pure_stdlib=args.pure_stdlib, store=args.store,
+                       profiler=StartupProfiler(enabled=args.profile_startup),
+                       batch_window=args.batch_window, batch_capacity=args.batch_size, policy=args.policy,
+                       max_in_flight=args.max_in_flight, max_held=args.max_held, metrics_window=args.metrics_window,
+                       trace_file=args.trace_file, max_wait=args.max_wait)
     root.mainloop()